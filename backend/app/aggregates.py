@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+
+from .models import StateTierCounts, Summary
+from .records import LeadRecord
+from .scoring import summarize_state_counts
+
+COMPONENTS = ("industry_fit", "product_match", "digital_signal", "scale_signal", "intent_signal", "penalties")
+SUMMARY_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+@dataclass
+class LeadAggregate:
+    """One-pass summary of scored leads; aggregates of disjoint chunks merge into the whole."""
+
+    # (state, tier, score) -> leads. Scores are clamped integers, so this doubles as an
+    # exact score histogram: quantiles need no sketch, and it stays a few thousand cells.
+    cells: Counter = field(default_factory=Counter)
+    # Per state, (-score, upload index) of its best row, so states order like the ranking.
+    state_first: dict[str, tuple[int, int]] = field(default_factory=dict)
+    component_totals: list[int] = field(default_factory=lambda: [0] * len(COMPONENTS))
+    count: int = 0
+
+    def add(self, leads: Iterable[LeadRecord], offset: int = 0) -> LeadAggregate:
+        # offset is the upload index of the first lead, so chunks can be added in any order.
+        cells = self.cells
+        first = self.state_first
+        fit = product = digital = scale = intent = penalties = 0
+        count = 0
+        for index, lead in enumerate(leads, offset):
+            score = lead.score
+            state = lead.state
+            cells[state, lead.tier, score] += 1
+            if state:
+                best = first.get(state)
+                if best is None or (-score, index) < best:
+                    first[state] = (-score, index)
+            fit += lead.industry_fit
+            product += lead.product_match
+            digital += lead.digital_signal
+            scale += lead.scale_signal
+            intent += lead.intent_signal
+            penalties += lead.penalties
+            count += 1
+        for position, value in enumerate((fit, product, digital, scale, intent, penalties)):
+            self.component_totals[position] += value
+        self.count += count
+        return self
+
+    def merge(self, other: LeadAggregate) -> LeadAggregate:
+        self.cells.update(other.cells)
+        for state, key in other.state_first.items():
+            best = self.state_first.get(state)
+            if best is None or key < best:
+                self.state_first[state] = key
+        for position, value in enumerate(other.component_totals):
+            self.component_totals[position] += value
+        self.count += other.count
+        return self
+
+    def score_total(self) -> int:
+        return sum(score * leads for (_, _, score), leads in self.cells.items())
+
+    def tier_counts(self) -> Counter:
+        tiers: Counter = Counter()
+        for (_, tier, _), leads in self.cells.items():
+            tiers[tier] += leads
+        return tiers
+
+    def state_tier_counts(self) -> dict[str, Counter]:
+        # States in order of first ranked appearance, like RankedLeads.
+        states: dict[str, Counter] = {state: Counter() for state in sorted(self.state_first, key=self.state_first.__getitem__)}
+        for (state, tier, _), leads in self.cells.items():
+            if state:
+                states[state][tier] += leads
+        return states
+
+    def quantiles(self, qs: Sequence[float]) -> list[float]:
+        # Linear interpolation between order statistics, as numpy.quantile does by default.
+        histogram: Counter = Counter()
+        for (_, _, score), leads in self.cells.items():
+            histogram[score] += leads
+        scores = sorted(histogram)
+        values = []
+        for q in qs:
+            if not scores:
+                values.append(0.0)
+                continue
+            rank = (self.count - 1) * q
+            low = self._order_statistic(scores, histogram, math.floor(rank))
+            high = self._order_statistic(scores, histogram, math.ceil(rank))
+            values.append(low + (high - low) * (rank - math.floor(rank)))
+        return values
+
+    @staticmethod
+    def _order_statistic(scores: list[int], histogram: Counter, rank: int) -> int:
+        seen = 0
+        for score in scores:
+            seen += histogram[score]
+            if rank < seen:
+                return score
+        return scores[-1]
+
+    def summary(self) -> Summary:
+        tiers = self.tier_counts()
+        state_tiers = self.state_tier_counts()
+        state_counts = Counter({state: sum(counts.values()) for state, counts in state_tiers.items()})
+        return Summary(
+            total_leads=self.count,
+            average_score=round(self.score_total() / self.count, 1) if self.count else 0.0,
+            tier_a=tiers["A"],
+            tier_b=tiers["B"],
+            tier_c=tiers["C"],
+            top_states=summarize_state_counts(state_counts),
+            score_quantiles={
+                f"p{round(q * 100)}": round(value, 1) for q, value in zip(SUMMARY_QUANTILES, self.quantiles(SUMMARY_QUANTILES))
+            },
+            state_tiers=[
+                StateTierCounts(
+                    state=state,
+                    total=state_counts[state],
+                    tier_a=counts["A"],
+                    tier_b=counts["B"],
+                    tier_c=counts["C"],
+                )
+                for state, counts in sorted(state_tiers.items(), key=lambda item: -state_counts[item[0]])
+            ],
+            component_averages={
+                name: round(total / self.count, 2) if self.count else 0.0
+                for name, total in zip(COMPONENTS, self.component_totals)
+            },
+        )
@@ -1,20 +1,143 @@
 from __future__ import annotations
 
 import json
-from typing import Optional
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
 
+from .metrics import (
+    AI_CACHE_HITS,
+    AI_FIRST_TOKEN_SECONDS,
+    AI_HEDGED_REQUESTS,
+    AI_REQUEST_SECONDS,
+    AI_REQUESTS,
+    AI_TEMPERATURE_RETRIES,
+)
+from .prompt_cache import PromptCache, prompt_key
+from .records import LeadRecord
 from .settings import settings
 
 try:
-    from openai import OpenAI
+    from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError, Timeout
+
+    # Worth another attempt within a draft's deadline; covers request timeouts too.
+    RETRYABLE_ERRORS: tuple[type[BaseException], ...] = (APIConnectionError, InternalServerError, RateLimitError)
 except Exception:  # pragma: no cover
     OpenAI = None
+    Timeout = None
+    RETRYABLE_ERRORS = ()
+
+# Optional sampling parameters; a model that rejects one is remembered and not sent it again.
+MODEL_PARAMS: dict[str, Any] = {"temperature": 0.2}
+
+# Rough sizing for batched prompts: an email (subject + <120 words + JSON keys) per lead,
+# and how many leads' worth of output fit in one request timeout.
+OUTPUT_TOKENS_PER_LEAD = 220
+BATCH_LEADS_PER_TIMEOUT = 4
+# First pause between attempts under a deadline; doubles per attempt, like the SDK's backoff.
+RETRY_BACKOFF_SECONDS = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 bytes of UTF-8 per token for English; CJK lands near one token per character.
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def plan_batches(blocks: list[str], header_tokens: int, budget: int, max_leads: int) -> list[list[int]]:
+    # Greedy packing in lead order: each batch's prompt plus expected output stays within
+    # the token budget, but a lead too large for any budget still gets a batch of its own.
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = header_tokens
+    for index, block in enumerate(blocks):
+        cost = estimate_tokens(block) + OUTPUT_TOKENS_PER_LEAD
+        if current and (used + cost > budget or len(current) >= max_leads):
+            batches.append(current)
+            current, used = [], header_tokens
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+class LatencyWindow:
+    """Recent successful request latencies per model."""
+
+    def __init__(self, size: int = 200) -> None:
+        self.size = size
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.size)
+            samples.append(seconds)
+
+    def quantile(self, model: str, q: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        # Nearest rank.
+        return samples[min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))]
+
+
+def retry_after_seconds(exc: BaseException) -> float:
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after", 0)) if response is not None else 0.0
+    except ValueError:
+        return 0.0
+
+
+def request_timeout(seconds: Optional[float]) -> Any:
+    # The whole read budget is `seconds`; connecting gets the (usually much shorter) connect timeout.
+    return Timeout(seconds, connect=min(settings.ai_connect_timeout, seconds))
 
 
 class AIService:
     def __init__(self) -> None:
         self.enabled = bool(settings.openai_api_key and OpenAI)
-        self.client = OpenAI(api_key=settings.openai_api_key) if self.enabled else None
+        self.client = (
+            OpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url or None,
+                timeout=Timeout(settings.ai_read_timeout, connect=settings.ai_connect_timeout),
+                max_retries=settings.ai_max_retries,
+            )
+            if self.enabled
+            else None
+        )
+        # Calls with a deadline retry themselves, so each attempt only gets the time left.
+        self._deadline_client = self.client.with_options(max_retries=0) if self.client is not None else None
+        # model -> parameters it rejected; filled on the first rejection, then never sent again.
+        self.unsupported_params: dict[str, set[str]] = {}
+        # Models whose MODEL_PARAMS have been tried once, and the probe in flight for the rest:
+        # one call per model sends them while concurrent calls wait for its answer.
+        self._checked_params: set[str] = set()
+        self._param_probes: dict[str, threading.Event] = {}
+        self._params_lock = threading.Lock()
+        self.latencies = LatencyWindow()
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        self.cache = (
+            PromptCache(
+                str(Path(settings.data_dir) / "ai_cache.sqlite3"),
+                ttl_seconds=settings.ai_cache_ttl_seconds,
+                memory_entries=settings.ai_cache_memory_entries,
+                disk_entries=settings.ai_cache_disk_entries,
+            )
+            if self.enabled and settings.ai_cache_enabled
+            else None
+        )
 
     @staticmethod
     def _clean_json_text(text: str) -> str:
@@ -28,56 +151,266 @@ class AIService:
             cleaned = "\n".join(lines).strip()
         return cleaned
 
-    def _call_model(self, prompt: str) -> str:
+    @staticmethod
+    def _prompt_key(prompt: str) -> str:
+        # Outputs from a non-default endpoint (e.g. the fake server) get their own cache keys.
+        model = f"{settings.openai_base_url}|{settings.openai_model}" if settings.openai_base_url else settings.openai_model
+        return prompt_key(model, prompt)
+
+    def _cached_draft(self, key: str, parse: Callable[[str], Optional[tuple[str, str]]]) -> Optional[tuple[str, str]]:
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
         try:
-            response = self.client.responses.create(
-                model=settings.openai_model,
-                input=prompt,
-                temperature=0.2,
-            )
-            return (response.output_text or "").strip()
+            draft = parse(cached)
+        except ValueError:
+            return None
+        if draft is not None:
+            AI_CACHE_HITS.inc(settings.openai_model)
+        return draft
+
+    def _store_draft(self, key: str, draft: tuple[str, str]) -> None:
+        self.cache.put(key, json.dumps({"subject": draft[0], "body": draft[1]}, ensure_ascii=False))
+
+    def _call_model(
+        self,
+        prompt: str,
+        parse: Callable[[str], Optional[tuple[str, str]]],
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> Optional[tuple[str, str]]:
+        # Only drafts that parse are cached, so a malformed reply is asked for again next
+        # time instead of being replayed. use_cache=False skips the lookup; a fresh draft
+        # still refreshes the cache.
+        key = self._prompt_key(prompt)
+        if use_cache and self.cache is not None:
+            draft = self._cached_draft(key, parse)
+            if draft is not None:
+                return draft
+
+        draft = parse(self._request_model(prompt, timeout))
+        if draft is not None and self.cache is not None:
+            self._store_draft(key, draft)
+        return draft
+
+    def _request_model(self, prompt: str, timeout: Optional[float] = None) -> str:
+        # timeout is a wall-clock budget for the whole call: retries, the parameter retry
+        # and a hedged duplicate all share one deadline.
+        model = settings.openai_model
+        start = time.perf_counter()
+        deadline = time.monotonic() + timeout if timeout else None
+        outcome = "error"
+        try:
+            if settings.ai_hedge_enabled:
+                text = self._send_hedged(model, prompt, deadline)
+            else:
+                text = self._send_timed(model, prompt, deadline)
+            outcome = "ok" if text else "empty"
+            return text
+        finally:
+            AI_REQUEST_SECONDS.observe(time.perf_counter() - start, model)
+            AI_REQUESTS.inc(model, outcome)
+
+    def _send_timed(self, model: str, prompt: str, deadline: Optional[float]) -> str:
+        start = time.perf_counter()
+        text = self._send_request(model, prompt, deadline)
+        self.latencies.add(model, time.perf_counter() - start)
+        return text
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                # Room for a primary and a backup per concurrent draft.
+                self._hedge_pool = ThreadPoolExecutor(max_workers=2 * settings.ai_max_concurrency + 2, thread_name_prefix="ai-hedge")
+            return self._hedge_pool
+
+    def _send_hedged(self, model: str, prompt: str, deadline: Optional[float]) -> str:
+        # Once a call outlives this model's recent p95, send a duplicate and take whichever
+        # answers first. The loser cannot be cancelled mid-request; its output is dropped.
+        delay = self.latencies.quantile(model, settings.ai_hedge_quantile, settings.ai_hedge_min_samples)
+        if delay is None:
+            return self._send_timed(model, prompt, deadline)
+        pool = self._hedge_executor()
+        primary = pool.submit(self._send_timed, model, prompt, deadline)
+        try:
+            return primary.result(timeout=max(delay, settings.ai_hedge_min_delay))
+        except FutureTimeout:
+            pass
+
+        AI_HEDGED_REQUESTS.inc(model, "sent")
+        backup = pool.submit(self._send_timed, model, prompt, deadline)
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        AI_HEDGED_REQUESTS.inc(model, "won")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _model_params(self, model: str, deadline: Optional[float] = None) -> tuple[dict[str, Any], Optional[threading.Event]]:
+        # Returns the parameters to send, and the probe event when this call is the one
+        # finding out whether the model accepts them.
+        while True:
+            with self._params_lock:
+                unsupported = self.unsupported_params.get(model, set())
+                if model in self._checked_params:
+                    return {name: value for name, value in MODEL_PARAMS.items() if name not in unsupported}, None
+                probe = self._param_probes.get(model)
+                if probe is None:
+                    probe = self._param_probes[model] = threading.Event()
+                    return {name: value for name, value in MODEL_PARAMS.items() if name not in unsupported}, probe
+            wait_seconds = deadline - time.monotonic() if deadline is not None else settings.ai_request_timeout
+            if not probe.wait(max(0.0, wait_seconds)):
+                # The probe is stuck; the parameters are optional, so go without them.
+                return {}, None
+
+    def unsupported_params_snapshot(self) -> dict[str, list[str]]:
+        # Probes update the memo from worker threads; copy it under their lock.
+        with self._params_lock:
+            return {model: sorted(params) for model, params in self.unsupported_params.items()}
+
+    def _finish_probe(self, model: str, probe: threading.Event, rejected: set[str], checked: bool) -> None:
+        # An inconclusive probe (e.g. a network error) lets the next call probe again.
+        with self._params_lock:
+            if rejected:
+                self.unsupported_params.setdefault(model, set()).update(rejected)
+            if checked:
+                self._checked_params.add(model)
+            del self._param_probes[model]
+        probe.set()
+
+    def _responses_create(self, model: str, prompt: str, params: dict[str, Any], deadline: Optional[float], **options: Any) -> Any:
+        if deadline is None:
+            return self.client.responses.create(model=model, input=prompt, **params, **options)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Model call deadline passed.")
+        return self._deadline_client.responses.create(
+            model=model, input=prompt, **params, timeout=request_timeout(remaining), **options
+        )
+
+    def _create(self, model: str, prompt: str, deadline: Optional[float] = None, **options: Any) -> Any:
+        params, probe = self._model_params(model, deadline)
+        rejected: set[str] = set()
+        checked = False
+        try:
+            response = self._responses_create(model, prompt, params, deadline, **options)
+            checked = True
+            return response
         except Exception as exc:
-            # Some fast models reject temperature; retry without it.
-            if "temperature" in str(exc).lower():
-                response = self.client.responses.create(
-                    model=settings.openai_model,
-                    input=prompt,
-                )
+            # Some fast models reject temperature; remember that and retry without it.
+            message = str(exc).lower()
+            rejected = {name for name in params if name in message}
+            if not rejected:
+                raise
+            checked = True
+        finally:
+            if probe is not None:
+                self._finish_probe(model, probe, rejected, checked)
+        if probe is None:
+            # A model that accepted the parameter before and rejects it now; record it too.
+            with self._params_lock:
+                self.unsupported_params.setdefault(model, set()).update(rejected)
+        if "temperature" in rejected:
+            AI_TEMPERATURE_RETRIES.inc(model)
+        params = {name: value for name, value in params.items() if name not in rejected}
+        return self._responses_create(model, prompt, params, deadline, **options)
+
+    def _send_request(self, model: str, prompt: str, deadline: Optional[float]) -> str:
+        if deadline is None:
+            response = self._create(model, prompt)
+            return (response.output_text or "").strip()
+        # The SDK would give each of its retries the full timeout, so with a deadline the
+        # retries happen here and stop once the next one could not finish in time.
+        attempt = 0
+        while True:
+            try:
+                response = self._create(model, prompt, deadline)
                 return (response.output_text or "").strip()
-            raise
+            except RETRYABLE_ERRORS as exc:
+                attempt += 1
+                pause = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                if isinstance(exc, RateLimitError):
+                    pause = max(pause, retry_after_seconds(exc))
+                if attempt > settings.ai_max_retries or time.monotonic() + pause >= deadline:
+                    raise
+                time.sleep(pause)
 
-    def generate_outreach(
+    def _stream_model(
         self,
-        *,
-        brand_name: str,
-        positioning: str,
-        company_name: str,
-        city: str,
-        state: str,
-        services: str,
-        description: str,
-        tone: str,
-        language: str,
-    ) -> Optional[tuple[str, str]]:
-        if not self.enabled:
-            return None
+        prompt: str,
+        parse: Callable[[str], Optional[tuple[str, str]]],
+        use_cache: bool = True,
+    ) -> Iterator[str]:
+        # Streaming counterpart of _call_model: a cache hit arrives as one chunk, and the
+        # output is cached once the stream completes, if it parses.
+        key = self._prompt_key(prompt)
+        if use_cache and self.cache is not None:
+            draft = self._cached_draft(key, parse)
+            if draft is not None:
+                yield json.dumps({"subject": draft[0], "body": draft[1]}, ensure_ascii=False)
+                return
 
-        target_language = "Simplified Chinese" if language.upper() == "CN" else "English"
+        model = settings.openai_model
+        start = time.perf_counter()
+        outcome = "error"
+        chunks: list[str] = []
+        try:
+            for delta in self._send_stream(model, prompt):
+                if not chunks:
+                    AI_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, model)
+                chunks.append(delta)
+                yield delta
+            outcome = "ok" if "".join(chunks).strip() else "empty"
+        finally:
+            AI_REQUEST_SECONDS.observe(time.perf_counter() - start, model)
+            AI_REQUESTS.inc(model, outcome)
 
-        prompt = f"""
-You are writing short B2B outreach for a furniture/lighting supplier.
-Return STRICT JSON only with keys: subject, body.
+        if self.cache is not None:
+            try:
+                draft = parse("".join(chunks).strip())
+            except ValueError:
+                draft = None
+            if draft is not None:
+                self._store_draft(key, draft)
+
+    def _send_stream(self, model: str, prompt: str) -> Iterator[str]:
+        # A rejected parameter fails the request before any event is streamed, so _create's
+        # retry applies here too; the client's read timeout bounds the gap between events.
+        stream = self._create(model, prompt, stream=True)
+        with stream:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    if event.delta:
+                        yield event.delta
+                elif event.type in ("response.failed", "response.incomplete", "error"):
+                    raise RuntimeError(f"Model stream ended with {event.type}.")
 
+    @staticmethod
+    def _brand_block(brand_name: str, positioning: str) -> str:
+        return f"""
 Brand:
 - name: {brand_name}
 - positioning: {positioning}
+""".strip()
 
-Prospect:
+    @staticmethod
+    def _prospect_block(company_name: str, city: str, state: str, services: str, description: str) -> str:
+        return f"""
 - company: {company_name}
 - city/state: {city}, {state}
 - services: {services}
 - description: {description}
+""".strip()
 
+    @staticmethod
+    def _outreach_constraints(language: str, tone: str) -> str:
+        target_language = "Simplified Chinese" if language.upper() == "CN" else "English"
+        return f"""
 Constraints:
 - output language: {target_language}
 - tone: {tone}
@@ -88,28 +421,299 @@ Constraints:
 - no hype, no emojis
 """.strip()
 
-        try:
-            text = self._call_model(prompt)
-            if not text:
-                return None
-
-            # Accept either strict JSON or simple fallback format.
-            cleaned = self._clean_json_text(text)
-            if cleaned.startswith("{"):
-                payload = json.loads(cleaned)
-                subject = str(payload.get("subject", "")).strip()
-                body = str(payload.get("body", "")).strip()
-                if subject and body:
-                    return subject, body
-
-            lines = [line.strip() for line in cleaned.splitlines() if line.strip()]
-            if len(lines) >= 2:
-                return lines[0][:70], "\n".join(lines[1:])
+    def _outreach_prompt(
+        self,
+        *,
+        brand_name: str,
+        positioning: str,
+        company_name: str,
+        city: str,
+        state: str,
+        services: str,
+        description: str,
+        tone: str,
+        language: str,
+    ) -> str:
+        return f"""
+You are writing short B2B outreach for a furniture/lighting supplier.
+Return STRICT JSON only with keys: subject, body.
+
+{self._brand_block(brand_name, positioning)}
+
+Prospect:
+{self._prospect_block(company_name, city, state, services, description)}
+
+{self._outreach_constraints(language, tone)}
+""".strip()
+
+    def _parse_outreach(self, text: str) -> Optional[tuple[str, str]]:
+        if not text:
+            return None
+
+        # Accept either strict JSON or simple fallback format.
+        cleaned = self._clean_json_text(text)
+        if cleaned.startswith("{"):
+            payload = json.loads(cleaned)
+            subject = str(payload.get("subject", "")).strip()
+            body = str(payload.get("body", "")).strip()
+            if subject and body:
+                return subject, body
+
+        lines = [line.strip() for line in cleaned.splitlines() if line.strip()]
+        if len(lines) >= 2:
+            return lines[0][:70], "\n".join(lines[1:])
+        return None
+
+    def generate_outreach(
+        self,
+        *,
+        brand_name: str,
+        positioning: str,
+        company_name: str,
+        city: str,
+        state: str,
+        services: str,
+        description: str,
+        tone: str,
+        language: str,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+    ) -> Optional[tuple[str, str]]:
+        if not self.enabled:
             return None
+
+        prompt = self._outreach_prompt(
+            brand_name=brand_name,
+            positioning=positioning,
+            company_name=company_name,
+            city=city,
+            state=state,
+            services=services,
+            description=description,
+            tone=tone,
+            language=language,
+        )
+
+        try:
+            return self._call_model(prompt, self._parse_outreach, timeout=timeout, use_cache=use_cache)
         except Exception:
             return None
 
-    def refine_outreach(
+    def _batch_prompt(self, blocks: list[str], *, brand_name: str, positioning: str, tone: str, language: str) -> str:
+        prospects = "\n\n".join(f"[{number}]\n{block}" for number, block in enumerate(blocks, start=1))
+        return f"""
+You are writing short B2B outreach for a furniture/lighting supplier.
+Write one email per prospect below.
+Return STRICT JSON only: an array with one object per prospect, in the same order,
+each with keys: id (the prospect number), company, subject, body.
+
+{self._brand_block(brand_name, positioning)}
+
+Prospects:
+{prospects}
+
+{self._outreach_constraints(language, tone)}
+""".strip()
+
+    def _parse_batch(self, text: str, companies: list[str]) -> dict[int, tuple[str, str]]:
+        # Maps position in the batch -> (subject, body). Items are matched by id, or by
+        # company name when the id is missing or wrong; malformed items are dropped.
+        cleaned = self._clean_json_text(text)
+        start, end = cleaned.find("["), cleaned.rfind("]")
+        if start < 0 or end < start:
+            return {}
+        try:
+            items = json.loads(cleaned[start : end + 1])
+        except ValueError:
+            return {}
+        if not isinstance(items, list):
+            return {}
+
+        by_company: dict[str, list[int]] = {}
+        for position, company in enumerate(companies):
+            by_company.setdefault(company.strip().lower(), []).append(position)
+
+        drafts: dict[int, tuple[str, str]] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            subject = item.get("subject")
+            body = item.get("body")
+            if not isinstance(subject, str) or not isinstance(body, str) or not subject.strip() or not body.strip():
+                continue
+            position: Optional[int] = None
+            try:
+                number = int(item.get("id"))
+            except (TypeError, ValueError):
+                number = 0
+            if 1 <= number <= len(companies) and number - 1 not in drafts:
+                position = number - 1
+            else:
+                candidates = [p for p in by_company.get(str(item.get("company", "")).strip().lower(), []) if p not in drafts]
+                if len(candidates) == 1:
+                    position = candidates[0]
+            if position is not None:
+                drafts[position] = (subject.strip(), body.strip())
+        return drafts
+
+    def generate_outreach_batched(
+        self,
+        leads: list[LeadRecord],
+        *,
+        brand_name: str,
+        positioning: str,
+        tone: str,
+        language: str,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> list[Optional[tuple[str, str]]]:
+        # Several prospects per request, sharing one brand/constraints block. Each lead's
+        # draft is cached under its single-lead prompt, so both modes reuse the same cache.
+        if not self.enabled or not leads:
+            return [None] * len(leads)
+
+        lead_timeout = timeout if timeout is not None else settings.ai_request_timeout
+        budget = settings.ai_batch_token_budget
+        max_leads = max(1, settings.ai_batch_max_leads)
+        results: list[Optional[tuple[str, str]]] = [None] * len(leads)
+        done_lock = threading.Lock()
+        done = 0
+
+        def finish(count: int) -> None:
+            nonlocal done
+            if progress is not None and count:
+                with done_lock:
+                    done += count
+                    progress(done)
+
+        blocks = [self._prospect_block(lead.company_name, lead.city, lead.state, lead.services, lead.description) for lead in leads]
+        keys = [
+            self._prompt_key(
+                self._outreach_prompt(
+                    brand_name=brand_name,
+                    positioning=positioning,
+                    company_name=lead.company_name,
+                    city=lead.city,
+                    state=lead.state,
+                    services=lead.services,
+                    description=lead.description,
+                    tone=tone,
+                    language=language,
+                ),
+            )
+            for lead in leads
+        ]
+
+        pending = list(range(len(leads)))
+        if use_cache and self.cache is not None:
+            for index in list(pending):
+                results[index] = self._cached_draft(keys[index], self._parse_outreach)
+                if results[index] is not None:
+                    pending.remove(index)
+            finish(len(leads) - len(pending))
+
+        header_tokens = estimate_tokens(self._batch_prompt([], brand_name=brand_name, positioning=positioning, tone=tone, language=language))
+
+        def run(batch: list[int]) -> None:
+            prompt = self._batch_prompt(
+                [blocks[index] for index in batch], brand_name=brand_name, positioning=positioning, tone=tone, language=language
+            )
+            # Output grows with the batch, so the timeout does too.
+            batch_timeout = lead_timeout * max(1.0, len(batch) / BATCH_LEADS_PER_TIMEOUT)
+            try:
+                drafts = self._parse_batch(self._request_model(prompt, batch_timeout), [leads[index].company_name for index in batch])
+            except Exception:
+                return
+            for position, draft in drafts.items():
+                index = batch[position]
+                results[index] = draft
+                if self.cache is not None:
+                    self._store_draft(keys[index], draft)
+            finish(len(drafts))
+
+        # The first round sends every lead; later rounds re-request only the leads
+        # whose items were missing or malformed.
+        for _ in range(1 + max(0, settings.ai_batch_retries)):
+            if not pending:
+                break
+            batches = plan_batches([blocks[index] for index in pending], header_tokens, budget, max_leads)
+            batches = [[pending[position] for position in batch] for batch in batches]
+            workers = max(1, min(max_concurrency or settings.ai_max_concurrency, len(batches)))
+            if workers == 1:
+                for batch in batches:
+                    run(batch)
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outreach") as executor:
+                    list(executor.map(run, batches))
+            pending = [index for index in pending if results[index] is None]
+        finish(len(pending))
+        return results
+
+    def generate_outreach_many(
+        self,
+        leads: list[LeadRecord],
+        *,
+        brand_name: str,
+        positioning: str,
+        tone: str,
+        language: str,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        use_cache: bool = True,
+        progress: Optional[Callable[[int], None]] = None,
+        batch: bool = False,
+    ) -> list[Optional[tuple[str, str]]]:
+        # Results line up with `leads`; a lead that fails or times out gets None
+        # so the caller keeps its template draft for that lead only.
+        if not self.enabled or not leads:
+            return [None] * len(leads)
+        if batch:
+            return self.generate_outreach_batched(
+                leads,
+                brand_name=brand_name,
+                positioning=positioning,
+                tone=tone,
+                language=language,
+                max_concurrency=max_concurrency,
+                timeout=timeout,
+                use_cache=use_cache,
+                progress=progress,
+            )
+
+        workers = max(1, min(max_concurrency or settings.ai_max_concurrency, len(leads)))
+        lead_timeout = timeout if timeout is not None else settings.ai_request_timeout
+        done_lock = threading.Lock()
+        done = 0
+
+        def generate(lead: LeadRecord) -> Optional[tuple[str, str]]:
+            nonlocal done
+            output = self.generate_outreach(
+                brand_name=brand_name,
+                positioning=positioning,
+                company_name=lead.company_name,
+                city=lead.city,
+                state=lead.state,
+                services=lead.services,
+                description=lead.description,
+                tone=tone,
+                language=language,
+                timeout=lead_timeout,
+                use_cache=use_cache,
+            )
+            if progress is not None:
+                with done_lock:
+                    done += 1
+                    progress(done)
+            return output
+
+        if workers == 1:
+            return [generate(lead) for lead in leads]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outreach") as executor:
+            return list(executor.map(generate, leads))
+
+    def _refine_prompt(
         self,
         *,
         language: str,
@@ -124,12 +728,9 @@ Constraints:
         current_subject: str,
         current_message: str,
         feedback: str,
-    ) -> Optional[tuple[str, str]]:
-        if not self.enabled:
-            return None
-
+    ) -> str:
         target_language = "Simplified Chinese" if language.upper() == "CN" else "English"
-        prompt = f"""
+        return f"""
 You are refining B2B outreach for a furniture/lighting supplier.
 Return STRICT JSON only with keys: subject, body.
 
@@ -161,16 +762,96 @@ Constraints:
 - no markdown fences, no explanation text
 """.strip()
 
-        try:
-            cleaned = self._clean_json_text(self._call_model(prompt))
-            if not cleaned:
-                return None
-            if cleaned.startswith("{"):
-                payload = json.loads(cleaned)
-                subject = str(payload.get("subject", "")).strip()
-                body = str(payload.get("body", "")).strip()
-                if subject and body:
-                    return subject, body
+    def _parse_refined(self, text: str) -> Optional[tuple[str, str]]:
+        cleaned = self._clean_json_text(text)
+        if not cleaned:
+            return None
+        if cleaned.startswith("{"):
+            payload = json.loads(cleaned)
+            subject = str(payload.get("subject", "")).strip()
+            body = str(payload.get("body", "")).strip()
+            if subject and body:
+                return subject, body
+        return None
+
+    def refine_outreach(
+        self,
+        *,
+        language: str,
+        tone: str,
+        brand_name: str,
+        positioning: str,
+        company_name: str,
+        city: str,
+        state: str,
+        services: str,
+        description: str,
+        current_subject: str,
+        current_message: str,
+        feedback: str,
+        use_cache: bool = True,
+    ) -> Optional[tuple[str, str]]:
+        if not self.enabled:
             return None
+
+        prompt = self._refine_prompt(
+            language=language,
+            tone=tone,
+            brand_name=brand_name,
+            positioning=positioning,
+            company_name=company_name,
+            city=city,
+            state=state,
+            services=services,
+            description=description,
+            current_subject=current_subject,
+            current_message=current_message,
+            feedback=feedback,
+        )
+
+        try:
+            return self._call_model(prompt, self._parse_refined, use_cache=use_cache)
         except Exception:
             return None
+
+    def refine_outreach_stream(
+        self,
+        *,
+        language: str,
+        tone: str,
+        brand_name: str,
+        positioning: str,
+        company_name: str,
+        city: str,
+        state: str,
+        services: str,
+        description: str,
+        current_subject: str,
+        current_message: str,
+        feedback: str,
+        use_cache: bool = True,
+    ) -> Iterator[tuple[str, object]]:
+        # Yields ("delta", text) while the model writes, then a final ("done", (subject, body))
+        # or ("done", None) when the completed output is not a valid draft.
+        prompt = self._refine_prompt(
+            language=language,
+            tone=tone,
+            brand_name=brand_name,
+            positioning=positioning,
+            company_name=company_name,
+            city=city,
+            state=state,
+            services=services,
+            description=description,
+            current_subject=current_subject,
+            current_message=current_message,
+            feedback=feedback,
+        )
+        chunks: list[str] = []
+        for delta in self._stream_model(prompt, self._parse_refined, use_cache=use_cache):
+            chunks.append(delta)
+            yield "delta", delta
+        try:
+            yield "done", self._parse_refined("".join(chunks))
+        except ValueError:
+            yield "done", None
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import zlib
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except Exception:  # pragma: no cover
+    brotli = None
+
+# Already compressed, or a live event stream where buffering would defeat the point.
+SKIP_CONTENT_TYPES = ("text/event-stream", "application/gzip", "image/", "video/", "audio/")
+# Bodies above this are compressed in the threadpool instead of on the event loop.
+THREADPOOL_BYTES = 256 * 1024
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    # Highest-q supported coding; brotli wins ties because it is smaller for JSON.
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best: Optional[str] = None
+    best_q = 0.0
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        candidates = supported if name == "*" else (name,)
+        for candidate in candidates:
+            if candidate in supported and q > 0 and (q > best_q or (q == best_q and candidate == "br")):
+                best, best_q = candidate, q
+    return best
+
+
+def weaken_etag(headers: MutableHeaders) -> None:
+    # Same entity, different bytes: the validator becomes weak.
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._br = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        # Streamed chunks are flushed so each one reaches the client as soon as it is written.
+        if self._br is not None:
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip response compression, for whole and streamed bodies."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def compress(data: bytes, final: bool) -> bytes:
+            if len(data) > THREADPOOL_BYTES:
+                return await run_in_threadpool(compressor.chunk, data, final)
+            return compressor.chunk(data, final)
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                start["headers"] = list(start.get("headers", []))
+                headers = MutableHeaders(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                if start["status"] == 304:
+                    # No body, but the validator must match the one sent with the compressed 200.
+                    weaken_etag(headers)
+                    headers.add_vary_header("Accept-Encoding")
+                skip = (
+                    "content-encoding" in headers
+                    or start["status"] in (204, 304)
+                    or any(content_type.startswith(kind) for kind in SKIP_CONTENT_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                )
+                if skip:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                weaken_etag(headers)
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(start)
+                else:
+                    body = await compress(body, True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+            await send({"type": "http.response.body", "body": await compress(body, not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Mapping, Optional
+
+from .aggregates import LeadAggregate
+from .ingest import iter_csv_rows
+from .records import LeadRecord
+from .scoring import (
+    ANGLE_TERMS,
+    ScoreBreakdown,
+    ScoringPlan,
+    build_reasons,
+    choose_tier,
+    hit_keyword,
+    join_reasons,
+    normalize_text,
+    offer_angle,
+    parse_services,
+    template_outreach,
+    to_int,
+)
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+DATASET_FORMAT = 2
+TEXT_COLUMNS = ("company_name", "city", "state", "website", "source", "services", "description")
+TEXT_DEFAULTS = {"company_name": "Unknown"}
+# Cached per-row hit vectors, one column per term of the plan they were built for:
+# keyword hits use contains_keyword() semantics (the score tables), term hits plain
+# substring checks (product_match and the offer angle), service hits exact services.
+HIT_KINDS = ("keyword", "term", "service")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("The dataset registry requires numpy.")
+
+
+def _hit_columns(plan: ScoringPlan) -> dict[str, tuple[str, ...]]:
+    return {
+        "keyword": tuple(dict.fromkeys([*plan.fit_keywords, *plan.intent_keywords, *plan.negative_keywords])),
+        "term": tuple(dict.fromkeys([*plan.product_terms, *ANGLE_TERMS])),
+        "service": tuple(plan.service_bonus),
+    }
+
+
+def _hit_arrays(descriptions: Iterable[str], services: Iterable[str], plan: ScoringPlan) -> dict[str, "np.ndarray"]:
+    columns = _hit_columns(plan)
+    hits = {kind: bytearray() for kind in HIT_KINDS}
+    rows = 0
+    for description, service in zip(descriptions, services):
+        text = normalize_text(description, service)
+        scan = plan.matcher.scan(text)
+        service_set = set(parse_services(service))
+        hits["keyword"] += bytes(hit_keyword(scan, text, key, plan.word_terms) for key in columns["keyword"])
+        hits["term"] += bytes(term in scan.found for term in columns["term"])
+        hits["service"] += bytes(name in service_set for name in columns["service"])
+        rows += 1
+
+    arrays: dict[str, "np.ndarray"] = {}
+    for kind in HIT_KINDS:
+        matrix = np.frombuffer(bytes(hits[kind]), dtype=np.uint8).reshape(rows, len(columns[kind]))
+        arrays[f"{kind}_columns"] = np.array(columns[kind], dtype=str)
+        arrays[f"{kind}_hits"] = np.packbits(matrix, axis=1)
+    return arrays
+
+
+def _pack_strings(values: list[str]) -> tuple["np.ndarray", "np.ndarray"]:
+    # UTF-8 bytes of every value back to back plus offsets; rows are sliced out on demand.
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class TextColumn:
+    def __init__(self, data: "np.ndarray", offsets: "np.ndarray") -> None:
+        self._data = data.tobytes()
+        self._offsets = offsets.tolist()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self._data[self._offsets[index] : self._offsets[index + 1]].decode("utf-8")
+
+    def values(self) -> list[str]:
+        return [self[index] for index in range(len(self))]
+
+
+@dataclass(frozen=True)
+class ScoreParts:
+    # Every score component that does not depend on request parameters, for one plan.
+    industry_fit: "np.ndarray"
+    product_match: "np.ndarray"
+    digital_signal: "np.ndarray"
+    intent_signal: "np.ndarray"
+    penalties: "np.ndarray"
+    base_scale_signal: "np.ndarray"
+    fixed_total: "np.ndarray"
+
+
+class Dataset:
+    """A parsed upload with cached keyword hits and per-plan score parts."""
+
+    def __init__(self, dataset_id: str, arrays: dict[str, "np.ndarray"]) -> None:
+        self.id = dataset_id
+        self.arrays = arrays
+        self.text = {name: TextColumn(arrays[f"{name}_data"], arrays[f"{name}_offsets"]) for name in TEXT_COLUMNS}
+        self.rows = len(self.text["company_name"])
+
+        self.hit_columns: dict[str, dict[str, int]] = {}
+        self.hits: dict[str, "np.ndarray"] = {}
+        for kind in HIT_KINDS:
+            columns = arrays[f"{kind}_columns"].tolist()
+            self.hit_columns[kind] = {column: index for index, column in enumerate(columns)}
+            # One uint8 per hit, 4x smaller than int32; _weighted() only widens the columns a plan uses.
+            self.hits[kind] = np.unpackbits(arrays[f"{kind}_hits"], axis=1, count=len(columns))
+        self.angle_columns = [(term, self.hit_columns["term"][term]) for term in ANGLE_TERMS]
+
+        states = self.text["state"].values()
+        self.state_upper = np.array([state.upper() for state in states], dtype=str)
+        self.state_names, self.state_codes = np.unique(np.array(states, dtype=str), return_inverse=True)
+
+        self._parts: OrderedDict[str, ScoreParts] = OrderedDict()
+        self._parts_lock = threading.Lock()
+
+    def covers(self, plan: ScoringPlan) -> bool:
+        return all(set(columns) <= self.hit_columns[kind].keys() for kind, columns in _hit_columns(plan).items())
+
+    def _weighted(self, kind: str, mapping: Mapping[str, int]) -> "np.ndarray":
+        columns = self.hit_columns[kind]
+        weights = np.zeros(len(columns), dtype=np.int32)
+        for term, weight in mapping.items():
+            weights[columns[term]] += weight
+        used = np.flatnonzero(weights)
+        if not used.size:
+            return np.zeros(self.rows, dtype=np.int32)
+        return self.hits[kind][:, used] @ weights[used]
+
+    def _points(self, kind: str, mapping: Mapping[str, int], cap: int) -> "np.ndarray":
+        return np.minimum(cap, self._weighted(kind, mapping))
+
+    def parts(self, plan: ScoringPlan) -> ScoreParts:
+        with self._parts_lock:
+            parts = self._parts.get(plan.digest)
+            if parts is not None:
+                self._parts.move_to_end(plan.digest)
+                return parts
+
+        caps = plan.caps
+        arrays = self.arrays
+        fit = self._points("keyword", plan.fit_keywords, caps["industry_fit"])
+        industry_fit = np.minimum(caps["industry_fit"], fit + self._weighted("service", plan.service_bonus))
+        product_match = self._points("term", plan.product_terms, caps["product_match"])
+        intent_signal = self._points("keyword", plan.intent_keywords, caps["intent_signal"])
+        penalties = self._points("keyword", plan.negative_keywords, caps["penalties"])
+
+        flags = arrays["has_website"].astype(np.int32) + arrays["has_trade_program"] + arrays["has_procurement_page"]
+        digital_signal = np.minimum(caps["digital_signal"], flags * 5)
+
+        employees = arrays["employee_estimate"]
+        projects = arrays["project_count"]
+        scale_signal = np.select([(employees >= 10) & (employees <= 80), employees > 80], [8, 5], 0)
+        scale_signal = scale_signal + np.select([projects >= 100, projects >= 60], [7, 4], 0)
+        # Everything but the target-state bonus.
+        base_scale_signal = np.minimum(caps["scale_signal"], scale_signal).astype(np.int32)
+
+        parts = ScoreParts(
+            industry_fit=industry_fit,
+            product_match=product_match,
+            digital_signal=digital_signal,
+            intent_signal=intent_signal,
+            penalties=penalties,
+            base_scale_signal=base_scale_signal,
+            fixed_total=industry_fit + product_match + digital_signal + intent_signal + penalties,
+        )
+        with self._parts_lock:
+            self._parts[plan.digest] = parts
+            while len(self._parts) > 4:
+                self._parts.popitem(last=False)
+        return parts
+
+    def rescore(self, plan: ScoringPlan, target_states: set[str], language: str, brand_name: str) -> DatasetLeads:
+        parts = self.parts(plan)
+        scale_signal = parts.base_scale_signal
+        if target_states:
+            in_target = np.isin(self.state_upper, list(target_states))
+            scale_signal = np.minimum(plan.caps["scale_signal"], scale_signal + in_target * 2)
+        total = np.clip(parts.fixed_total + scale_signal, 0, 100)
+        return DatasetLeads(self, plan, parts, scale_signal, total, language, brand_name)
+
+
+class DatasetLeads:
+    """Ranked view of a rescored dataset; lead records are built only for rows that are read."""
+
+    def __init__(
+        self,
+        dataset: Dataset,
+        plan: ScoringPlan,
+        parts: ScoreParts,
+        scale_signal: "np.ndarray",
+        total: "np.ndarray",
+        language: str,
+        brand_name: str,
+    ) -> None:
+        self.dataset = dataset
+        self.plan = plan
+        self.parts = parts
+        self.scale_signal = scale_signal
+        self.total = total
+        self.language = language
+        self.brand_name = brand_name
+        # Stable, so ties keep upload order like RankedLeads.
+        self._order = np.argsort(-total, kind="stable")
+        self._records: dict[int, LeadRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self.total)
+
+    def record(self, index: int) -> LeadRecord:
+        lead = self._records.get(index)
+        if lead is None:
+            lead = self._records[index] = self._build(index)
+        return lead
+
+    def _build(self, index: int) -> LeadRecord:
+        data = self.dataset
+        parts = self.parts
+        text = {name: column[index] for name, column in data.text.items()}
+        breakdown = ScoreBreakdown(
+            industry_fit=int(parts.industry_fit[index]),
+            product_match=int(parts.product_match[index]),
+            digital_signal=int(parts.digital_signal[index]),
+            scale_signal=int(self.scale_signal[index]),
+            intent_signal=int(parts.intent_signal[index]),
+            penalties=int(parts.penalties[index]),
+        )
+        term_hits = data.hits["term"][index]
+        angle = offer_angle({term for term, column in data.angle_columns if term_hits[column]}, self.language)
+        subject, message = template_outreach(text["company_name"], text["city"], angle, self.brand_name, self.language)
+        return LeadRecord(
+            **text,
+            score=breakdown.total,
+            tier=choose_tier(breakdown.total, self.plan),
+            reason=join_reasons(build_reasons(breakdown, self.language), self.language),
+            outreach_subject=subject,
+            outreach_message=message,
+            industry_fit=breakdown.industry_fit,
+            product_match=breakdown.product_match,
+            digital_signal=breakdown.digital_signal,
+            scale_signal=breakdown.scale_signal,
+            intent_signal=breakdown.intent_signal,
+            penalties=breakdown.penalties,
+        )
+
+    def top(self, k: int) -> list[LeadRecord]:
+        return self.page(0, k)
+
+    def ranked(self) -> list[LeadRecord]:
+        return self.page(0, len(self))
+
+    def page(self, offset: int, limit: int) -> list[LeadRecord]:
+        offset = max(0, offset)
+        return [self.record(index) for index in self._order[offset : offset + max(0, limit)].tolist()]
+
+    def iter_pages(self, size: int) -> Iterator[list[LeadRecord]]:
+        # For full exports: records not already built are built per page and not kept.
+        size = max(1, size)
+        for offset in range(0, len(self._order), size):
+            indexes = self._order[offset : offset + size].tolist()
+            yield [self._records.get(index) or self._build(index) for index in indexes]
+
+    def aggregate(self) -> LeadAggregate:
+        # Same as LeadAggregate().add() over every record, computed on the arrays.
+        data = self.dataset
+        names = data.state_names.tolist()
+        total = self.total
+        tier_codes = np.select([total >= self.plan.tier_a, total >= self.plan.tier_b], [0, 1], 2)
+        # Totals are clipped to 0..100, so (state, tier, score) packs into one bincount key.
+        counts = np.bincount((data.state_codes * 3 + tier_codes) * 101 + total)
+        cells: Counter = Counter()
+        for key in np.flatnonzero(counts).tolist():
+            code, rest = divmod(key, 303)
+            tier, score = divmod(rest, 101)
+            cells[names[code], "ABC"[tier], score] = int(counts[key])
+
+        # A state's first ranked row is its best (-score, upload index).
+        codes = data.state_codes[self._order]
+        first = np.full(len(names), len(codes), dtype=np.int64)
+        np.minimum.at(first, codes, np.arange(len(codes)))
+        state_first = {}
+        for code, position in enumerate(first.tolist()):
+            if names[code] and position < len(codes):
+                index = int(self._order[position])
+                state_first[names[code]] = (-int(total[index]), index)
+
+        parts = self.parts
+        columns = (parts.industry_fit, parts.product_match, parts.digital_signal, self.scale_signal, parts.intent_signal, parts.penalties)
+        return LeadAggregate(
+            cells=cells,
+            state_first=state_first,
+            component_totals=[int(column.sum()) for column in columns],
+            count=len(total),
+        )
+
+
+class DatasetStore:
+    """Uploads keyed by content hash, kept as columnar .npz files with a small in-memory LRU."""
+
+    def __init__(self, root: str, *, memory_entries: int, disk_entries: int) -> None:
+        self.root = Path(root)
+        self.memory_entries = max(1, memory_entries)
+        self.disk_entries = disk_entries
+        self._loaded: OrderedDict[str, Dataset] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, dataset_id: str) -> Path:
+        return self.root / f"{dataset_id}.npz"
+
+    def ingest(self, stream: BinaryIO, chunk_size: int, plan: ScoringPlan) -> tuple[Optional[Dataset], bool]:
+        # Returns (dataset, created); (None, False) when the upload has no data rows.
+        _require_numpy()
+        digest = hashlib.sha256()
+        while chunk := stream.read(chunk_size):
+            digest.update(chunk)
+        dataset_id = digest.hexdigest()
+
+        dataset = self.get(dataset_id, plan)
+        if dataset is not None:
+            return dataset, False
+
+        stream.seek(0)
+        arrays = self._parse(stream, chunk_size, plan)
+        if arrays is None:
+            return None, False
+        self._save(dataset_id, arrays)
+        return self._remember(Dataset(dataset_id, arrays)), True
+
+    def get(self, dataset_id: str, plan: ScoringPlan) -> Optional[Dataset]:
+        _require_numpy()
+        if not dataset_id.isalnum():
+            return None
+        with self._lock:
+            dataset = self._loaded.get(dataset_id)
+            if dataset is not None:
+                self._loaded.move_to_end(dataset_id)
+
+        if dataset is None:
+            path = self.path(dataset_id)
+            try:
+                with np.load(path) as stored:
+                    arrays = {name: stored[name] for name in stored.files}
+                os.utime(path)
+            except (FileNotFoundError, ValueError, OSError):
+                return None
+            if int(arrays.get("format", -1)) != DATASET_FORMAT:
+                return None
+            dataset = Dataset(dataset_id, arrays)
+
+        if not dataset.covers(plan):
+            # The plan has terms this dataset has no hit columns for: rebuild them from the stored text.
+            arrays = dict(dataset.arrays)
+            arrays.update(_hit_arrays(dataset.text["description"].values(), dataset.text["services"].values(), plan))
+            self._save(dataset_id, arrays)
+            dataset = Dataset(dataset_id, arrays)
+        return self._remember(dataset)
+
+    def _remember(self, dataset: Dataset) -> Dataset:
+        with self._lock:
+            self._loaded[dataset.id] = dataset
+            self._loaded.move_to_end(dataset.id)
+            while len(self._loaded) > self.memory_entries:
+                self._loaded.popitem(last=False)
+        return dataset
+
+    def _parse(self, stream: BinaryIO, chunk_size: int, plan: ScoringPlan) -> Optional[dict[str, "np.ndarray"]]:
+        text: dict[str, list[str]] = {name: [] for name in TEXT_COLUMNS}
+        employees: list[int] = []
+        projects: list[int] = []
+        has_trade: list[bool] = []
+        has_procurement: list[bool] = []
+
+        for row in iter_csv_rows(stream, chunk_size):
+            for name, values in text.items():
+                value = row.get(name)
+                values.append(TEXT_DEFAULTS.get(name, "") if value is None else value)
+            # Clamped like score_batch so huge numbers still compare correctly in int64.
+            employees.append(max(-(2**62), min(2**62, to_int(row.get("employee_estimate", "0")))))
+            projects.append(max(-(2**62), min(2**62, to_int(row.get("project_count", "0")))))
+            has_trade.append((row.get("has_trade_program") or "").strip().lower() == "yes")
+            has_procurement.append((row.get("has_procurement_page") or "").strip().lower() == "yes")
+
+        if not employees:
+            return None
+
+        arrays: dict[str, "np.ndarray"] = {
+            "format": np.array(DATASET_FORMAT),
+            "employee_estimate": np.array(employees, dtype=np.int64),
+            "project_count": np.array(projects, dtype=np.int64),
+            "has_website": np.array([website.startswith("http") for website in text["website"]], dtype=bool),
+            "has_trade_program": np.array(has_trade, dtype=bool),
+            "has_procurement_page": np.array(has_procurement, dtype=bool),
+        }
+        arrays.update(_hit_arrays(text["description"], text["services"], plan))
+        for name, values in text.items():
+            arrays[f"{name}_data"], arrays[f"{name}_offsets"] = _pack_strings(values)
+        return arrays
+
+    def _save(self, dataset_id: str, arrays: dict[str, "np.ndarray"]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self.path(dataset_id))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._prune()
+
+    def _prune(self) -> None:
+        if self.disk_entries <= 0:
+            return
+        files = sorted(self.root.glob("*.npz"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in files[self.disk_entries :]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+import zlib
+from itertools import chain
+from dataclasses import dataclass
+
+from .models import DedupeReport, DuplicateGroup, DuplicateRow
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
+
+# Dropped from company names before comparing, so "Acme Studio LLC" matches "Acme Studio".
+NAME_STOPWORDS = frozenset(
+    "the and inc incorporated llc ltd limited co corp corporation company pllc llp plc gmbh".split()
+)
+# Each field is compared on its own, and a row's similarity is the weighted mean over the
+# fields both rows have: a blank website is missing, not a mismatch.
+FIELD_WEIGHTS = {"name": 0.5, "domain": 0.3, "description": 0.2}
+# Descriptions contribute a fixed-size sample of their word 3-grams (the k smallest hashes,
+# which similar texts mostly share), so long boilerplate cannot dominate.
+DESCRIPTION_SHINGLES = 8
+# Rows per MinHash block: bounds the (shingles x permutations) matrix to a few MB.
+SIGNATURE_BLOCK_ROWS = 512
+SEED = 20240601
+# Candidate pairs whose MinHash estimate is this far below the threshold skip the exact check.
+ESTIMATE_MARGIN = 0.2
+
+
+NAME_SEPARATORS = re.compile(r"[\W_]+")
+URL_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://")
+HOST_END = re.compile(r"[/?#:]")
+# Description words are split on whitespace once ASCII punctuation is blanked, over all rows
+# in one bytes pass: several times faster than a \w+ scan per row.
+PUNCTUATION_TO_SPACE = bytes(32 if chr(byte) in "!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~" else byte for byte in range(256))
+NUMBERS = re.compile(r"\d+")
+
+
+def _nfkc(text: str) -> str:
+    return text if text.isascii() else unicodedata.normalize("NFKC", text)
+
+
+def normalize_name(name: str) -> str:
+    text = _nfkc(name).lower().replace("&", " and ")
+    return "".join(word for word in NAME_SEPARATORS.split(text) if word and word not in NAME_STOPWORDS)
+
+
+def normalize_domain(website: str) -> str:
+    domain = URL_SCHEME.sub("", website.strip().lower())
+    domain = HOST_END.split(domain, maxsplit=1)[0]
+    return domain.removeprefix("www.").rstrip(".")
+
+
+def _domain_label(domain: str) -> str:
+    # The top-level domain is shared by unrelated sites, so only the rest is compared.
+    head, dot, _ = domain.rpartition(".")
+    return head if dot and head else domain
+
+
+@dataclass
+class FieldShingles:
+    """One field's shingles for every row, as sorted (row, value) arrays."""
+
+    rows: "np.ndarray"
+    values: "np.ndarray"
+
+    def present(self) -> "np.ndarray":
+        return _sorted_unique(self.rows)
+
+    def row_set(self, index: int) -> frozenset[int]:
+        first, last = np.searchsorted(self.rows, (index, index + 1))
+        return frozenset(self.values[first:last].tolist())
+
+
+def _mix(values: "np.ndarray") -> "np.ndarray":
+    # splitmix64 finalizer: spreads small codes over all 64 bits.
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _sorted_unique(values: "np.ndarray") -> "np.ndarray":
+    # np.unique for an already sorted array.
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+
+def _unique_pairs(rows: "np.ndarray", values: "np.ndarray", bits: int) -> FieldShingles:
+    # values must fit in `bits` bits; (row, value) pairs sort as one integer.
+    keys = _sorted_unique(np.sort(rows.astype(np.uint64) << np.uint64(bits) | values))
+    return FieldShingles((keys >> np.uint64(bits)).astype(np.int64), keys & np.uint64((1 << bits) - 1))
+
+
+def _grams(lengths: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    # Per row, the start offsets of its 3-grams within the row (one padded gram for 1-2 items).
+    counts = np.where(lengths >= 3, lengths - 2, np.minimum(lengths, 1))
+    rows = np.repeat(np.arange(len(lengths)), counts)
+    firsts = np.cumsum(counts) - counts
+    return rows, np.arange(int(counts.sum())) - np.repeat(firsts, counts)
+
+
+def _char_shingles(texts: list[bytes]) -> FieldShingles:
+    # UTF-8 byte trigrams, packed into 24 bits; no hashing needed.
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    data = np.frombuffer(b"".join(texts) + b"\0\0", dtype=np.uint8).astype(np.uint64)
+    starts = np.cumsum(lengths) - lengths
+    rows, offsets = _grams(lengths)
+    positions = starts[rows] + offsets
+    ends = (starts + lengths)[rows]
+    codes = data[positions] << np.uint64(16)
+    codes |= np.where(positions + 1 < ends, data[positions + 1], 0) << np.uint64(8)
+    codes |= np.where(positions + 2 < ends, data[positions + 2], 0)
+    return _unique_pairs(rows, codes, 24)
+
+
+def _description_shingles(descriptions: list[str]) -> FieldShingles:
+    # Word 3-grams over per-run word ids, keeping each row's DESCRIPTION_SHINGLES smallest hashes.
+    # Rows are joined on NUL, which the callers strip from descriptions.
+    text = "\0".join(descriptions).lower().encode("utf-8").translate(PUNCTUATION_TO_SPACE)
+    words = [line.split() for line in text.split(b"\0")] if descriptions else []
+    flat = list(chain.from_iterable(words))
+    vocabulary = {word: number for number, word in enumerate(dict.fromkeys(flat), 1)}
+    ids = np.fromiter(map(vocabulary.__getitem__, flat), dtype=np.uint64, count=len(flat))
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    starts = np.cumsum(lengths) - lengths
+    rows, offsets = _grams(lengths)
+    positions = starts[rows] + offsets
+    ends = (starts + lengths)[rows]
+    padded = np.concatenate((ids, np.zeros(2, dtype=np.uint64)))
+    codes = padded[positions]
+    for step in (1, 2):
+        codes = _mix(codes * np.uint64(0x9E3779B97F4A7C15) + np.where(positions + step < ends, padded[positions + step], 0))
+    # The row index takes the top bits of the sort key; the hash keeps the rest.
+    bits = 64 - max(1, len(descriptions).bit_length())
+    shingles = _unique_pairs(rows, codes >> np.uint64(64 - bits), bits)
+    bounds = np.searchsorted(shingles.rows, shingles.rows, side="left")
+    keep = np.arange(len(shingles.rows)) - bounds < DESCRIPTION_SHINGLES
+    return FieldShingles(shingles.rows[keep], shingles.values[keep])
+
+
+def _signatures(shingles: FieldShingles, present: "np.ndarray", bands: int, band_rows: int) -> tuple["np.ndarray", "np.ndarray"]:
+    # MinHash of the present rows. Each shingle is mixed to 32 bits once; the permutations
+    # are then (a * x + b) mod 2**32 with odd a, which keeps the whole matrix in uint32.
+    # Returns one 32-bit key per band, and the top 16 bits of every hash for estimating
+    # similarity cheaply.
+    rng = np.random.default_rng(SEED)
+    perms = bands * band_rows
+    a = rng.integers(0, 2**32, size=perms, dtype=np.uint32) | np.uint32(1)
+    b = rng.integers(0, 2**32, size=perms, dtype=np.uint32)
+    mix = rng.integers(1, 2**63, size=band_rows, dtype=np.uint64) | np.uint64(1)
+    mixed = (_mix(shingles.values) >> np.uint64(32)).astype(np.uint32)
+    bounds = np.searchsorted(shingles.rows, present)
+    keys = np.empty((len(present), bands), dtype=np.uint32)
+    sketches = np.empty((len(present), perms), dtype=np.uint16)
+    for start in range(0, len(present), SIGNATURE_BLOCK_ROWS):
+        stop = min(start + SIGNATURE_BLOCK_ROWS, len(present))
+        first = bounds[start]
+        last = bounds[stop] if stop < len(present) else len(mixed)
+        signatures = np.minimum.reduceat(mixed[first:last, None] * a + b, bounds[start:stop] - first, axis=0)
+        sketches[start:stop] = signatures >> np.uint32(16)
+        banded = signatures.reshape(stop - start, bands, band_rows).astype(np.uint64)
+        keys[start:stop] = ((banded * mix).sum(axis=2) >> np.uint64(32)).astype(np.uint32)
+    return keys, sketches
+
+
+def _candidate_pairs(keys: "np.ndarray", present: "np.ndarray") -> "np.ndarray":
+    # Rows sharing a band key are paired with the first row and the previous row of that
+    # bucket. Returns (low, high) row-index codes as low * 2**32 + high.
+    rows = len(keys)
+    codes = []
+    if rows < 2:
+        return np.empty(0, dtype=np.int64)
+    for band in range(keys.shape[1]):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        same = np.concatenate(([False], sorted_keys[1:] == sorted_keys[:-1]))
+        starts = np.maximum.accumulate(np.where(same, 0, np.arange(rows)))
+        leaders = order[starts]
+        previous = np.concatenate(([0], order[:-1]))
+        for other in (leaders, previous):
+            low = present[np.minimum(order[same], other[same])]
+            high = present[np.maximum(order[same], other[same])]
+            codes.append(low.astype(np.int64) << 32 | high)
+    return _sorted_unique(np.sort(np.concatenate(codes)))
+
+
+def _name_numbers(name: str) -> int:
+    # 0 when the name has no numbers; otherwise a code of the numbers it contains.
+    numbers = NUMBERS.findall(_nfkc(name))
+    return zlib.crc32(" ".join(numbers).encode("utf-8")) + 1 if numbers else 0
+
+
+def _jaccard(left: frozenset[int], right: frozenset[int]) -> float:
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+def dedupe_rows(
+    rows: list[dict[str, str]],
+    *,
+    threshold: float,
+    bands: int,
+    band_rows: int,
+) -> tuple[list[dict[str, str]], DedupeReport]:
+    """Drops near-duplicate rows, keeping the first of each group in upload order."""
+    if np is None:
+        raise RuntimeError("Duplicate detection requires numpy.")
+    bands, band_rows = max(1, bands), max(1, band_rows)
+    count = len(rows)
+    fields = {
+        "name": _char_shingles([normalize_name(row.get("company_name") or "").encode("utf-8") for row in rows]),
+        "domain": _char_shingles([_domain_label(normalize_domain(row.get("website") or "")).encode("utf-8") for row in rows]),
+        "description": _description_shingles([(row.get("description") or "").replace("\0", " ") for row in rows]),
+    }
+    present = {name: shingles.present() for name, shingles in fields.items()}
+
+    pairs = np.empty((0, 2), dtype=np.int64)
+    if count > 1:
+        # The description alone weighs too little to reach the threshold next to a name or
+        # domain, so LSH over those two fields proposes the candidates.
+        sketches: dict[str, "np.ndarray"] = {}
+        codes = []
+        for name in ("name", "domain"):
+            keys, field_sketches = _signatures(fields[name], present[name], bands, band_rows)
+            sketch_rows = np.zeros((count, bands * band_rows), dtype=np.uint16)
+            sketch_rows[present[name]] = field_sketches
+            sketches[name] = sketch_rows
+            codes.append(_candidate_pairs(keys, present[name]))
+        unique = _sorted_unique(np.sort(np.concatenate(codes)))
+        pairs = np.stack((unique >> 32, unique & 0xFFFFFFFF), axis=1)
+
+        # Numbers in a name ("Studio 54" vs "Studio 55") must agree when both names have them.
+        numbers = np.fromiter((_name_numbers(row.get("company_name") or "") for row in rows), dtype=np.int64, count=count)
+        left, right = numbers[pairs[:, 0]], numbers[pairs[:, 1]]
+        pairs = pairs[(left == 0) | (right == 0) | (left == right)]
+
+        # Most bucket mates are far below the threshold; the MinHash estimate (with the
+        # description taken as a full match) drops them before the exact check.
+        has = {name: np.zeros(count, dtype=bool) for name in fields}
+        for name in fields:
+            has[name][present[name]] = True
+        estimate = np.empty(len(pairs))
+        for start in range(0, len(pairs), 65536):
+            chunk = pairs[start : start + 65536]
+            total = np.zeros(len(chunk))
+            weight = np.zeros(len(chunk))
+            for name, field_weight in FIELD_WEIGHTS.items():
+                both = has[name][chunk[:, 0]] & has[name][chunk[:, 1]]
+                if name in sketches:
+                    similarity = (sketches[name][chunk[:, 0]] == sketches[name][chunk[:, 1]]).mean(axis=1)
+                else:
+                    similarity = 1.0
+                total += np.where(both, field_weight * similarity, 0.0)
+                weight += np.where(both, field_weight, 0.0)
+            estimate[start : start + len(chunk)] = np.divide(total, weight, out=np.zeros(len(chunk)), where=weight > 0)
+        pairs = pairs[estimate >= threshold - ESTIMATE_MARGIN]
+
+    # LSH only proposes pairs; each is checked on the exact shingle sets.
+    sets: dict[tuple[str, int], frozenset[int]] = {}
+
+    def row_set(name: str, index: int) -> frozenset[int]:
+        found = sets.get((name, index))
+        if found is None:
+            found = sets[name, index] = fields[name].row_set(index)
+        return found
+
+    parent = list(range(count))
+    similarity: dict[int, float] = {}
+
+    def root(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for low, high in pairs.tolist():
+        total = weight = 0.0
+        for name, field_weight in FIELD_WEIGHTS.items():
+            first_set, second_set = row_set(name, low), row_set(name, high)
+            if first_set and second_set:
+                total += field_weight * _jaccard(first_set, second_set)
+                weight += field_weight
+        score = total / weight if weight else 0.0
+        if score < threshold:
+            continue
+        first, second = root(low), root(high)
+        if first == second:
+            continue
+        # The group keeps its earliest row.
+        keep, merge = min(first, second), max(first, second)
+        parent[merge] = keep
+        # Score of the match that joined this row (or the group it headed) to the group.
+        similarity[merge] = round(score, 3)
+
+    groups: dict[int, list[int]] = {}
+    kept: list[dict[str, str]] = []
+    for index, row in enumerate(rows):
+        group = root(index)
+        if group == index:
+            kept.append(row)
+        else:
+            groups.setdefault(group, []).append(index)
+
+    return kept, DedupeReport(
+        rows_in=len(rows),
+        rows_kept=len(kept),
+        groups=[
+            DuplicateGroup(
+                row=group + 1,
+                company_name=rows[group].get("company_name") or "",
+                merged=[
+                    DuplicateRow(row=index + 1, company_name=rows[index].get("company_name") or "", similarity=similarity[index])
+                    for index in members
+                ],
+            )
+            for group, members in sorted(groups.items())
+        ],
+    )
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from typing import Iterable, Iterator
+
+from .records import dump_json, lead_payload
+from .reporting import lead_section, report_header
+from .results import StoredResult
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "markdown": ("text/markdown; charset=utf-8", "md"),
+}
+# Same columns as the UI's CSV download.
+CSV_COLUMNS = (
+    "company_name",
+    "city",
+    "state",
+    "website",
+    "source",
+    "score",
+    "tier",
+    "reason",
+    "outreach_subject",
+    "outreach_message",
+)
+# Leads per written chunk: large enough to amortize the per-chunk overhead, small enough
+# that a 500k-lead export never holds more than one page of encoded output.
+EXPORT_PAGE_SIZE = 2000
+
+
+def _csv_chunks(result: StoredResult) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    for page in result.leads.iter_pages(EXPORT_PAGE_SIZE):
+        writer.writerows([getattr(lead, column) for column in CSV_COLUMNS] for lead in page)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(result: StoredResult) -> Iterator[bytes]:
+    for page in result.leads.iter_pages(EXPORT_PAGE_SIZE):
+        yield b"".join(dump_json(lead_payload(lead)) + b"\n" for lead in page)
+
+
+def _markdown_chunks(result: StoredResult) -> Iterator[bytes]:
+    # The full ranked list in the same layout as top_leads_markdown.
+    yield "\n".join(report_header(result.language)).encode("utf-8") + b"\n"
+    number = 0
+    for page in result.leads.iter_pages(EXPORT_PAGE_SIZE):
+        lines: list[str] = []
+        for lead in page:
+            number += 1
+            lines.extend(lead_section(number, lead, result.language))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_chunks(result: StoredResult, fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    writers = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "markdown": _markdown_chunks}
+    chunks = writers[fmt](result)
+    return gzip_chunks(chunks) if gzip else chunks
+
+
+def export_filename(result_id: str, fmt: str, gzip: bool = False) -> str:
+    name = f"{'lead_report' if fmt == 'markdown' else 'ranked_leads'}_{result_id[:8]}.{EXPORT_FORMATS[fmt][1]}"
+    return f"{name}.gz" if gzip else name
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import codecs
+from csv import DictReader
+from io import StringIO
+from typing import BinaryIO, Iterator
+
+CSV_ENCODING = "utf-8-sig"
+
+
+def iter_text_lines(stream: BinaryIO, chunk_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(CSV_ENCODING)()
+    pending = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        final = not chunk
+        pending += decoder.decode(chunk, final=final)
+        # newline="" splits on \r, \n and \r\n only, like opening the CSV with newline="".
+        lines = StringIO(pending, newline="").readlines()
+        if not final and lines:
+            # The last line may be cut mid-record (or between \r and \n); finish it with the next chunk.
+            pending = lines.pop()
+        else:
+            pending = ""
+        yield from lines
+        if final:
+            return
+
+
+def iter_csv_rows(stream: BinaryIO, chunk_size: int) -> Iterator[dict[str, str]]:
+    return iter(DictReader(iter_text_lines(stream, chunk_size)))
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+COUNTERS = ("rows_parsed", "rows_scored", "ai_drafts_done", "ai_drafts_total")
+COLUMNS = ("job_id", "status", "created_at", "updated_at", *COUNTERS, "error", "result")
+
+
+class JobStore:
+    """SQLite table of background jobs: status, progress counters and the final result JSON."""
+
+    def __init__(self, path: str, *, retention_hours: float, upload_dir: Optional[str] = None) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.retention_hours = retention_hours
+        self.upload_dir = Path(upload_dir) if upload_dir else None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "rows_parsed INTEGER NOT NULL DEFAULT 0, rows_scored INTEGER NOT NULL DEFAULT 0, "
+            "ai_drafts_done INTEGER NOT NULL DEFAULT 0, ai_drafts_total INTEGER NOT NULL DEFAULT 0, "
+            "error TEXT NOT NULL DEFAULT '', result TEXT)"
+        )
+        # Jobs that were in flight when the process stopped will never finish.
+        self._db.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?)",
+            (JOB_FAILED, "Interrupted by server restart.", time.time(), JOB_QUEUED, JOB_RUNNING),
+        )
+        self._db.commit()
+        # ...and so will never delete their upload copies.
+        if self.upload_dir is not None and self.upload_dir.is_dir():
+            for leftover in self.upload_dir.glob("*.csv"):
+                leftover.unlink(missing_ok=True)
+        with self._lock:
+            self._prune(time.time())
+
+    def upload_path(self, job_id: str) -> Path:
+        if self.upload_dir is None:
+            raise ValueError("JobStore has no upload directory.")
+        return self.upload_dir / f"{job_id}.csv"
+
+    def create(self) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            self._db.execute(
+                "INSERT INTO jobs (job_id, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, now, now),
+            )
+            self._db.commit()
+        return job_id
+
+    def _prune(self, now: float) -> None:
+        # Finished jobs (and their result JSON) older than the retention window; callers hold the lock.
+        if self.retention_hours <= 0:
+            return
+        self._db.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (JOB_SUCCEEDED, JOB_FAILED, now - self.retention_hours * 3600),
+        )
+        self._db.commit()
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        if not fields:
+            return
+        unknown = set(fields) - set(COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ?",
+                (*fields.values(), time.time(), job_id),
+            )
+            self._db.commit()
+
+    def get(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+
+class JobProgress:
+    """Collects progress counters from a running job and flushes them to the store at most every `interval` seconds."""
+
+    def __init__(self, store: JobStore, job_id: str, interval: float = 0.5) -> None:
+        self.store = store
+        self.job_id = job_id
+        self.interval = interval
+        self.counts: dict[str, int] = {}
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, **counts: int) -> None:
+        with self._lock:
+            self.counts.update(counts)
+            if time.monotonic() - self._flushed_at < self.interval:
+                return
+            self._flushed_at = time.monotonic()
+            pending = dict(self.counts)
+        self.store.update(self.job_id, **pending)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending = dict(self.counts)
+        self.store.update(self.job_id, **pending)
+
+
+class JobRunner:
+    def __init__(self, store: JobStore, workers: int) -> None:
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+
+    def submit(self, job_id: str, work: Callable[[JobProgress], str], cleanup: Optional[Callable[[], None]] = None) -> None:
+        # `work` receives a progress callback and returns the serialized result.
+        self._executor.submit(self._run, job_id, work, cleanup)
+
+    def _run(self, job_id: str, work: Callable[[JobProgress], str], cleanup: Optional[Callable[[], None]]) -> None:
+        progress = JobProgress(self.store, job_id)
+        try:
+            self.store.update(job_id, status=JOB_RUNNING)
+            result = work(progress)
+            progress.flush()
+            self.store.update(job_id, status=JOB_SUCCEEDED, result=result)
+        except Exception as exc:
+            progress.flush()
+            self.store.update(job_id, status=JOB_FAILED, error=str(exc) or exc.__class__.__name__)
+        finally:
+            if cleanup is not None:
+                cleanup()
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional, Sequence
+
+from .records import LeadRecord, lead_payload
+
+RECORD_COLUMNS = (
+    "company_name",
+    "city",
+    "state",
+    "website",
+    "source",
+    "services",
+    "description",
+    "score",
+    "tier",
+    "reason",
+    "outreach_subject",
+    "outreach_message",
+    "industry_fit",
+    "product_match",
+    "digital_signal",
+    "scale_signal",
+    "intent_signal",
+    "penalties",
+)
+COLUMNS = ("id", "run_id", "rank", "created_at", *RECORD_COLUMNS)
+MAX_SEARCH_LIMIT = 500
+# A lead's id is score << SCORE_SHIFT | sequence, so id order is score order (newest run
+# first, then rank, within a score). Every search reads ids in descending order, which
+# FTS5 doclists and the rowid-suffixed indexes can do without sorting.
+SCORE_SHIFT = 56
+RANK_BITS = 26
+# Ranks are stored complemented in RANK_BITS bits; a bigger run would overlap the previous run's ids.
+MAX_RUN_LEADS = (1 << RANK_BITS) - 1
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    "run_id TEXT PRIMARY KEY, created_at REAL NOT NULL, brand_name TEXT NOT NULL, language TEXT NOT NULL, "
+    "scoring_plan_version TEXT NOT NULL, leads INTEGER NOT NULL DEFAULT 0, seq INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS runs_created ON runs(created_at)",
+    "CREATE TABLE IF NOT EXISTS leads ("
+    "id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, rank INTEGER NOT NULL, created_at REAL NOT NULL, "
+    "company_name TEXT NOT NULL, city TEXT NOT NULL, state TEXT NOT NULL COLLATE NOCASE, website TEXT NOT NULL, "
+    "source TEXT NOT NULL COLLATE NOCASE, services TEXT NOT NULL, description TEXT NOT NULL, "
+    "score INTEGER NOT NULL, tier TEXT NOT NULL, reason TEXT NOT NULL, "
+    "outreach_subject TEXT NOT NULL, outreach_message TEXT NOT NULL, "
+    "industry_fit INTEGER NOT NULL, product_match INTEGER NOT NULL, digital_signal INTEGER NOT NULL, "
+    "scale_signal INTEGER NOT NULL, intent_signal INTEGER NOT NULL, penalties INTEGER NOT NULL)",
+    # Entries end in the rowid, so a run's leads come out of this index in score order.
+    "CREATE INDEX IF NOT EXISTS leads_run ON leads(run_id)",
+    # External-content index: the text lives once, in leads; triggers keep the index in step.
+    # state, tier and source are indexed as words too: FTS5 serves those filters as well.
+    "CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5("
+    "description, services, state, tier, source, content='leads', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_insert AFTER INSERT ON leads BEGIN "
+    "INSERT INTO leads_fts(rowid, description, services, state, tier, source) "
+    "VALUES (new.id, new.description, new.services, new.state, new.tier, new.source); END",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_delete AFTER DELETE ON leads BEGIN "
+    "INSERT INTO leads_fts(leads_fts, rowid, description, services, state, tier, source) "
+    "VALUES ('delete', old.id, old.description, old.services, old.state, old.tier, old.source); END",
+)
+
+
+class RunTooLarge(ValueError):
+    pass
+
+
+def match_expression(text: str) -> str:
+    # Plain words (a trailing * keeps prefix matching), all required; FTS5 syntax in user
+    # input is treated as text rather than failing the query.
+    terms = re.findall(r"\w+\*?", text)
+    return " ".join(f'"{term[:-1]}"*' if term.endswith("*") else f'"{term}"' for term in terms)
+
+
+def _phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def lead_id(score: int, run_seq: int, rank: int) -> int:
+    # Ranks are stored complemented so that, descending, a run lists its best rank first.
+    if not 0 <= rank <= MAX_RUN_LEADS:
+        raise ValueError(f"Rank {rank} does not fit in {RANK_BITS} bits.")
+    sequence = run_seq << RANK_BITS | (MAX_RUN_LEADS - rank)
+    return max(0, min(score, 100)) << SCORE_SHIFT | sequence
+
+
+def score_bound(score: int) -> int:
+    # Lowest id with this score.
+    return max(0, min(score, 101)) << SCORE_SHIFT
+
+
+def encode_search_cursor(last_id: int) -> str:
+    return str(last_id)
+
+
+def decode_search_cursor(cursor: str) -> Optional[int]:
+    if not cursor:
+        return None
+    last_id = int(cursor)
+    if not 0 <= last_id < 1 << 63:
+        raise ValueError(f"cursor out of range: {cursor}")
+    return last_id
+
+
+class LeadStore:
+    """SQLite archive of every run's ranked leads, searched through FTS5 in score order."""
+
+    INSERT_BATCH = 5000
+
+    def __init__(self, path: str, *, retention_days: float) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.retention_days = retention_days
+        # WAL lets searches read on their own connection while a run is being written.
+        self._write_db = sqlite3.connect(path, check_same_thread=False)
+        self._write_db.execute("PRAGMA journal_mode=WAL")
+        self._write_db.execute("PRAGMA synchronous=NORMAL")
+        self._write_db.execute("PRAGMA analysis_limit=1000")
+        for statement in SCHEMA:
+            self._write_db.execute(statement)
+        self._write_db.commit()
+        self._read_db = sqlite3.connect(path, check_same_thread=False)
+        self._read_lock = threading.Lock()
+        # One writer thread: runs are archived off the request path, in order.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lead-store")
+        self.max_run_leads = MAX_RUN_LEADS
+        self.stats = {"runs_saved": 0, "leads_saved": 0, "runs_pruned": 0, "runs_rejected": 0, "errors": 0}
+
+    def save(
+        self,
+        run_id: str,
+        pages: Iterable[list[LeadRecord]],
+        *,
+        brand_name: str,
+        language: str,
+        scoring_plan_version: str,
+    ) -> Future:
+        # pages yields the run's leads in rank order.
+        return self._writer.submit(self._write, run_id, pages, brand_name, language, scoring_plan_version, time.time())
+
+    def flush(self) -> None:
+        # Waits for every run saved so far to be written.
+        self._writer.submit(lambda: None).result()
+
+    def _write(
+        self,
+        run_id: str,
+        pages: Iterable[list[LeadRecord]],
+        brand_name: str,
+        language: str,
+        scoring_plan_version: str,
+        created_at: float,
+    ) -> None:
+        db = self._write_db
+        rank = 0
+        placeholders = ", ".join("?" * len(COLUMNS))
+        insert = f"INSERT INTO leads ({', '.join(COLUMNS)}) VALUES ({placeholders})"
+        score = RECORD_COLUMNS.index("score")
+        try:
+            # One transaction per run, so searches never see half of one.
+            with db:
+                # A re-saved run id replaces the earlier copy.
+                db.execute("DELETE FROM leads WHERE run_id = ?", (run_id,))
+                db.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+                (run_seq,) = db.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM runs").fetchone()
+                db.execute(
+                    "INSERT INTO runs (run_id, created_at, brand_name, language, scoring_plan_version, seq) VALUES (?, ?, ?, ?, ?, ?)",
+                    (run_id, created_at, brand_name, language, scoring_plan_version, run_seq),
+                )
+                for page in pages:
+                    rows = []
+                    for lead in page:
+                        rank += 1
+                        if rank > self.max_run_leads:
+                            raise RunTooLarge(f"Runs over {self.max_run_leads} leads are not archived.")
+                        values = [getattr(lead, column) for column in RECORD_COLUMNS]
+                        values[2] = values[2].strip()
+                        rows.append((lead_id(values[score], run_seq, rank), run_id, rank, created_at, *values))
+                    db.executemany(insert, rows)
+                db.execute("UPDATE runs SET leads = ? WHERE run_id = ?", (rank, run_id))
+            self.stats["runs_saved"] += 1
+            self.stats["leads_saved"] += rank
+            self._prune(created_at)
+            # Keeps the planner's row estimates per run, state and tier current; sampled, so cheap.
+            db.execute("PRAGMA optimize")
+        except RunTooLarge:
+            # Rolled back whole: the run is left out rather than stored with ids that collide.
+            self.stats["runs_rejected"] += 1
+        except sqlite3.Error:
+            self.stats["errors"] += 1
+
+    def _prune(self, now: float) -> None:
+        if self.retention_days <= 0:
+            return
+        cutoff = now - self.retention_days * 86400
+        db = self._write_db
+        with db:
+            expired = [row[0] for row in db.execute("SELECT run_id FROM runs WHERE created_at < ?", (cutoff,))]
+            for run_id in expired:
+                db.execute("DELETE FROM leads WHERE run_id = ?", (run_id,))
+                db.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+        self.stats["runs_pruned"] += len(expired)
+
+    def search(
+        self,
+        *,
+        query: str = "",
+        states: Sequence[str] = (),
+        tiers: Sequence[str] = (),
+        sources: Sequence[str] = (),
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        since: Optional[float] = None,
+        run_id: str = "",
+        limit: int = 50,
+        cursor: Optional[int] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        expression = match_expression(query) if query else ""
+        if query and not expression:
+            return [], None
+        clauses: list[str] = []
+        params: list[Any] = []
+        facets: list[str] = []
+        for column, values in (("state", states), ("tier", tiers), ("source", sources)):
+            if not values:
+                continue
+            clauses.append(f"leads.{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+            # FTS5 merges the values' doclists in rowid order, so a common value stops at
+            # limit and a rare one reads only its own rows. It matches words, not whole
+            # values, so the IN clause stays to make it exact.
+            if all(re.search(r"\w", value) for value in values):
+                facets.append(f"{column} : ({' OR '.join(_phrase(value) for value in values)})")
+        terms = [f"{{description services}} : ({expression})"] if expression else []
+        terms.extend(facets)
+        # Score bounds and the cursor are id ranges; on the FTS5 rowid, they bound its scan.
+        key = "leads_fts.rowid" if terms else "leads.id"
+        upper = cursor
+        if max_score is not None:
+            upper = min(upper, score_bound(max_score + 1)) if upper is not None else score_bound(max_score + 1)
+        if upper is not None:
+            clauses.append(f"{key} < ?")
+            params.append(upper)
+        if min_score is not None:
+            clauses.append(f"{key} >= ?")
+            params.append(score_bound(min_score))
+        if run_id:
+            clauses.append("leads.run_id = ?")
+            params.append(run_id)
+        if since is not None:
+            # Leads share their run's timestamp, so since selects whole runs; the run
+            # index then finds a recent handful without scanning older ones.
+            clauses.append("leads.run_id IN (SELECT run_id FROM runs WHERE created_at >= ?)")
+            params.append(since)
+
+        source = "leads"
+        if terms:
+            # FTS5 returns matches in descending rowid order, i.e. by score, so the
+            # query stops after limit rows however common the terms are.
+            source = "leads_fts JOIN leads ON leads.id = leads_fts.rowid"
+            clauses.insert(0, "leads_fts MATCH ?")
+            params.insert(0, " AND ".join(terms))
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+        with self._read_lock:
+            db = self._read_db
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            sql = f"SELECT {', '.join(f'leads.{column}' for column in COLUMNS)} FROM {source} {where} ORDER BY {key} DESC LIMIT ?"
+            rows = db.execute(sql, (*params, limit + 1)).fetchall()
+
+        leads = []
+        for row in rows[:limit]:
+            values = dict(zip(COLUMNS, row))
+            lead = lead_payload(LeadRecord(**{column: values[column] for column in RECORD_COLUMNS}))
+            created_at = datetime.fromtimestamp(values["created_at"], timezone.utc).isoformat()
+            leads.append({"run_id": values["run_id"], "rank": values["rank"], "created_at": created_at, **lead})
+        next_cursor = encode_search_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+        return leads, next_cursor
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._read_lock:
+            runs, leads = self._read_db.execute("SELECT COUNT(*), COALESCE(SUM(leads), 0) FROM runs").fetchone()
+        return {**self.stats, "runs": runs, "leads": leads}
@@ -1,20 +1,51 @@
 from __future__ import annotations
 
-from csv import DictReader
+import shutil
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from io import StringIO
-from statistics import mean
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
+from . import metrics
 from .ai_service import AIService
-from .models import LeadResult, LeadScoreBreakdown, ProcessResponse, RefineRequest, RefineResponse, Summary
-from .reporting import top_leads_markdown
-from .scoring import choose_tier, pick_offer_angle, score_row, summarize_state_tiers, template_outreach
+from .compression import CompressionMiddleware
+from .datasets import DatasetStore
+from .exports import EXPORT_FORMATS, export_chunks, export_filename
+from .jobs import JOB_FAILED, JOB_QUEUED, JobProgress, JobRunner, JobStore
+from .lead_store import LeadStore, decode_search_cursor
+from .models import (
+    DatasetInfo,
+    JobCreated,
+    JobStatus,
+    LeadPage,
+    LeadSearchPage,
+    ProcessResponse,
+    RefineRequest,
+    RefineResponse,
+)
+from .parallel import shutdown_scoring_pool, warm_scoring_pool
+from .plans import PlanStore
+from .profiling import ServerTimingMiddleware, request_profile
+from .pipeline import InputError, ProcessOptions, ProcessResult, process_csv, register_dataset, rescore_dataset
+from .records import dump_json, lead_payload
+from .response_cache import CachedResponse, ResponseCache, etag_matches, process_cache_key, upload_digest
+from .results import ResultStore, StoredResult, decode_cursor, encode_cursor
 from .settings import settings
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await run_in_threadpool(warm_scoring_pool)
+    yield
+    shutdown_scoring_pool()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 origins = [origin.strip() for origin in settings.cors_origins.split(",") if origin.strip()]
 app.add_middleware(
@@ -23,9 +54,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(ServerTimingMiddleware)
+if settings.response_compression:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.response_compression_min_bytes)
 
 ai_service = AIService()
+result_store = ResultStore(settings.result_store_max_results, settings.result_store_ttl_seconds)
+job_store = JobStore(
+    str(Path(settings.data_dir) / "jobs.sqlite3"),
+    retention_hours=settings.job_retention_hours,
+    upload_dir=str(Path(settings.data_dir) / "jobs"),
+)
+job_runner = JobRunner(job_store, settings.job_workers)
+scoring_plans = PlanStore(settings.scoring_plan_path, settings.scoring_plan_check_seconds)
+response_cache = ResponseCache(
+    max_entries=settings.process_cache_entries,
+    max_bytes=settings.process_cache_max_mb * 1024 * 1024,
+    ttl_seconds=settings.process_cache_ttl_seconds,
+    ai_ttl_seconds=settings.process_cache_ai_ttl_seconds,
+)
+lead_store = (
+    LeadStore(str(Path(settings.data_dir) / "leads.sqlite3"), retention_days=settings.lead_store_retention_days)
+    if settings.lead_store_enabled
+    else None
+)
+dataset_store = DatasetStore(
+    str(Path(settings.data_dir) / "datasets"),
+    memory_entries=settings.dataset_memory_entries,
+    disk_entries=settings.dataset_disk_entries,
+)
 
 
 @app.get("/api/health")
@@ -34,32 +93,52 @@ def health() -> dict:
         "status": "ok",
         "env": settings.app_env,
         "ai_enabled": ai_service.enabled,
+        "ai_cache": ai_service.cache.snapshot() if ai_service.cache else None,
+        "ai_unsupported_params": ai_service.unsupported_params_snapshot(),
+        "scoring_plan": scoring_plans.snapshot(),
+        "process_cache": response_cache.snapshot(),
+        "lead_store": lead_store.snapshot() if lead_store is not None else None,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
 
 
-@app.post("/api/refine-outreach", response_model=RefineResponse)
-def refine_outreach(payload: RefineRequest) -> RefineResponse:
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics_text() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def check_refine_request(payload: RefineRequest) -> None:
     if not ai_service.enabled:
         raise HTTPException(status_code=400, detail="AI service is not enabled on backend.")
 
     if not payload.feedback.strip():
         raise HTTPException(status_code=400, detail="Feedback is required.")
 
-    result = ai_service.refine_outreach(
-        language=payload.language,
-        tone=payload.tone,
-        brand_name=payload.brand_name,
-        positioning=payload.positioning,
-        company_name=payload.company_name,
-        city=payload.city,
-        state=payload.state,
-        services=payload.services,
-        description=payload.description,
-        current_subject=payload.current_subject,
-        current_message=payload.current_message,
-        feedback=payload.feedback,
-    )
+
+@app.post("/api/refine-outreach", response_model=RefineResponse)
+def refine_outreach(payload: RefineRequest, request: Request) -> RefineResponse:
+    check_refine_request(payload)
+
+    profile = request_profile(request)
+    with metrics.stage_timer("refine", "ai"):
+        result = profile.call(
+            ai_service.refine_outreach,
+            language=payload.language,
+            tone=payload.tone,
+            brand_name=payload.brand_name,
+            positioning=payload.positioning,
+            company_name=payload.company_name,
+            city=payload.city,
+            state=payload.state,
+            services=payload.services,
+            description=payload.description,
+            current_subject=payload.current_subject,
+            current_message=payload.current_message,
+            feedback=payload.feedback,
+            use_cache=payload.use_cache,
+        )
+    if profile.enabled:
+        return profile.response()
     if not result:
         raise HTTPException(status_code=500, detail="Failed to refine outreach draft.")
 
@@ -67,9 +146,43 @@ def refine_outreach(payload: RefineRequest) -> RefineResponse:
     return RefineResponse(subject=subject, message=message)
 
 
-@app.post("/api/process", response_model=ProcessResponse)
-async def process_leads(
-    file: UploadFile = File(...),
+def stream_event(fmt: str, event: str, payload: dict) -> bytes:
+    if fmt == "ndjson":
+        return dump_json({"event": event, **payload}) + b"\n"
+    return b"event: " + event.encode() + b"\ndata: " + dump_json(payload) + b"\n\n"
+
+
+@app.post("/api/refine-outreach/stream")
+def refine_outreach_stream(
+    payload: RefineRequest,
+    format: str = Query("sse", pattern="^(sse|ndjson)$"),
+) -> StreamingResponse:
+    # "delta" events carry raw model output as it arrives; the last event is "done" with the
+    # validated {subject, message}, or "error".
+    check_refine_request(payload)
+    events = ai_service.refine_outreach_stream(**payload.model_dump())
+
+    def body() -> Iterator[bytes]:
+        # A sync generator: Starlette pulls it from the threadpool, so the blocking SDK stream
+        # never runs on the event loop.
+        with metrics.stage_timer("refine", "ai_stream"):
+            try:
+                for kind, value in events:
+                    if kind == "delta":
+                        yield stream_event(format, "delta", {"text": value})
+                    elif value:
+                        subject, message = value
+                        yield stream_event(format, "done", {"subject": subject, "message": message})
+                    else:
+                        yield stream_event(format, "error", {"detail": "Failed to refine outreach draft."})
+            except Exception:
+                yield stream_event(format, "error", {"detail": "Failed to refine outreach draft."})
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def process_options(
     target_states: str = Form("AZ,CA,TX,FL,NY"),
     brand_name: str = Form("Sunny Home"),
     positioning: str = Form("Mid-to-high-end furniture and lighting for premium projects."),
@@ -77,130 +190,321 @@ async def process_leads(
     language: str = Form("EN"),
     use_ai: bool = Form(False),
     ai_limit: int = Form(10),
-) -> ProcessResponse:
-    normalized_language = "CN" if str(language).strip().upper() == "CN" else "EN"
+    ai_cache: bool = Form(True),
+    ai_batch: bool = Form(False),
+    dedupe: bool = Form(False),
+    page_size: int = Form(0),
+    view: str = Form("full"),
+    fields: str = Form(""),
+    draft_rows: int = Form(25),
+) -> ProcessOptions:
+    options = ProcessOptions(
+        target_states=target_states,
+        brand_name=brand_name,
+        positioning=positioning,
+        tone=tone,
+        language=language,
+        use_ai=use_ai,
+        ai_limit=ai_limit,
+        ai_cache=ai_cache,
+        ai_batch=ai_batch,
+        dedupe=dedupe,
+        page_size=page_size,
+        view=view,
+        fields=fields,
+        draft_rows=draft_rows,
+    )
+    # Checked here so a bad view or field list fails before any upload is read.
+    try:
+        options.lead_keys()
+    except InputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return options
 
+
+def checked_upload(file: UploadFile) -> BinaryIO:
     filename = file.filename or ""
     if not filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Please upload a CSV file.")
 
-    content = await file.read()
-    if not content:
+    stream = file.file
+    if not stream.read(1):
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    stream.seek(0)
+    return stream
+
+
+def json_response(body: bytes) -> Response:
+    # Bodies built by records.dump_json; skips re-validating every lead through pydantic.
+    return Response(content=body, media_type="application/json")
+
+
+def archive_result(result: ProcessResult) -> None:
+    # /api/process and job runs only; written to the lead store in the background from the stored ranking.
+    stored = result_store.get(result.result_id)
+    if lead_store is None or stored is None:
+        return
+    lead_store.save(
+        result.result_id,
+        stored.leads.iter_pages(LeadStore.INSERT_BATCH),
+        brand_name=result.brand_name,
+        language=result.language,
+        scoring_plan_version=result.scoring_plan_version,
+    )
+
+
+def cached_response(request: Request, entry: CachedResponse, status: str) -> Response:
+    headers = {"ETag": entry.etag, "X-Process-Cache": status}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+@app.post("/api/process", response_model=ProcessResponse)
+async def process_leads(
+    request: Request,
+    file: UploadFile = File(...),
+    options: ProcessOptions = Depends(process_options),
+) -> Response:
+    stream = checked_upload(file)
+    profile = request_profile(request)
+    plan = scoring_plans.current()
+
+    # Same upload bytes, form fields, scoring plan and model: answer from the response cache
+    # (ai_cache=false forces a fresh run). Profiled requests always do the work.
+    cache_key = ""
+    if response_cache.enabled and not profile.enabled:
+        digest = await run_in_threadpool(upload_digest, stream, settings.csv_chunk_size)
+        ai_backend = f"{settings.openai_base_url}|{settings.openai_model}" if options.use_ai and ai_service.enabled else ""
+        cache_key = process_cache_key(digest, options, plan.digest, ai_backend)
+        cached = response_cache.get(cache_key) if options.ai_cache else None
+        # The body links to its ranked result; once that has left the result store, rebuild.
+        if cached is not None and result_store.get(cached.result_id) is not None:
+            return cached_response(request, cached, "hit")
 
+    # Parsing, scoring and model calls are blocking; keep them off the event loop.
     try:
-        decoded = content.decode("utf-8-sig")
-        reader = DictReader(StringIO(decoded))
-        rows = list(reader)
+        result = await run_in_threadpool(
+            profile.call,
+            process_csv,
+            stream,
+            options,
+            ai_service=ai_service,
+            result_store=result_store,
+            plan=plan,
+        )
+    except InputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    archive_result(result)
+    body = await run_in_threadpool(profile.call, result.to_json)
+    if profile.enabled:
+        return profile.response()
+    if cache_key:
+        return cached_response(request, response_cache.put(cache_key, body, result.result_id, ai=result.ai_enabled), "miss")
+    return json_response(body)
+
+
+@app.post("/api/jobs", response_model=JobCreated, status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    options: ProcessOptions = Depends(process_options),
+) -> JobCreated:
+    stream = checked_upload(file)
+    plan = scoring_plans.current()
+    job_id = job_store.create()
+
+    # The upload's temp file goes away with the request, so the job gets its own copy.
+    upload_path = job_store.upload_path(job_id)
+    upload_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with upload_path.open("wb") as target:
+            await run_in_threadpool(shutil.copyfileobj, stream, target, settings.csv_chunk_size)
     except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Could not parse CSV: {exc}") from exc
+        upload_path.unlink(missing_ok=True)
+        job_store.update(job_id, status=JOB_FAILED, error=str(exc) or exc.__class__.__name__)
+        raise
+
+    def work(progress: JobProgress) -> str:
+        with upload_path.open("rb") as job_stream:
+            result = process_csv(
+                job_stream,
+                options,
+                ai_service=ai_service,
+                result_store=result_store,
+                plan=plan,
+                progress=progress,
+                pipeline="job",
+            )
+        archive_result(result)
+        return result.to_json().decode("utf-8")
+
+    job_runner.submit(job_id, work, cleanup=lambda: upload_path.unlink(missing_ok=True))
+    return JobCreated(job_id=job_id, status=JOB_QUEUED)
 
-    if not rows:
-        raise HTTPException(status_code=400, detail="CSV has no data rows.")
 
-    normalized_states = {s.strip().upper() for s in target_states.split(",") if s.strip()}
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+def job_status(job_id: str) -> Response:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
 
-    scored_rows: list[dict] = []
-    for row in rows:
-        breakdown, reasons, text = score_row(row, normalized_states, normalized_language)
-        tier = choose_tier(breakdown.total)
-        reason = ("；" if normalized_language == "CN" else "; ").join(reasons) if reasons else ("整体匹配度一般" if normalized_language == "CN" else "General fit")
+    result = job.pop("result")
+    for field in ("created_at", "updated_at"):
+        job[field] = datetime.fromtimestamp(job[field], timezone.utc).isoformat()
+    # The stored result is already ProcessResponse JSON; splice it in rather than re-parsing it.
+    status = dump_json(job)
+    return json_response(status[:-1] + b',"result":' + (result.encode("utf-8") if result else b"null") + b"}")
 
-        company = row.get("company_name", "Unknown")
-        city = row.get("city", "")
-        state = row.get("state", "")
 
-        angle = pick_offer_angle(text, normalized_language)
-        subject, message = template_outreach(company, city, angle, brand_name, normalized_language)
+@app.post("/api/datasets", response_model=DatasetInfo)
+async def create_dataset(file: UploadFile = File(...)) -> DatasetInfo:
+    stream = checked_upload(file)
+    try:
+        dataset, created = await run_in_threadpool(register_dataset, stream, dataset_store, scoring_plans.current())
+    except InputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return DatasetInfo(dataset_id=dataset.id, rows=dataset.rows, created=created)
+
+
+@app.post("/api/datasets/{dataset_id}/rescore", response_model=ProcessResponse)
+async def rescore(dataset_id: str, options: ProcessOptions = Depends(process_options)) -> Response:
+    plan = scoring_plans.current()
+    try:
+        dataset = await run_in_threadpool(dataset_store.get, dataset_id, plan)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset not found; upload it again.")
+
+    result = await run_in_threadpool(
+        rescore_dataset,
+        dataset,
+        options,
+        ai_service=ai_service,
+        result_store=result_store,
+        plan=plan,
+    )
+    # Not archived: a rescore only re-weighs a dataset whose runs are already in the lead store.
+    return json_response(await run_in_threadpool(result.to_json))
+
+
+@app.get("/api/results/{result_id}/leads", response_model=LeadPage)
+def result_leads(result_id: str, cursor: str = Query(""), limit: int = Query(100, ge=1, le=1000)) -> Response:
+    stored = result_store.get(result_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired.")
+
+    try:
+        offset = decode_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
 
-        scored_rows.append(
+    leads = stored.leads.page(offset, limit)
+    end = offset + len(leads)
+    return json_response(
+        dump_json(
             {
-                "company_name": company,
-                "city": city,
-                "state": state,
-                "website": row.get("website", ""),
-                "source": row.get("source", ""),
-                "services": row.get("services", ""),
-                "description": row.get("description", ""),
-                "score": breakdown.total,
-                "tier": tier,
-                "reason": reason,
-                "outreach_subject": subject,
-                "outreach_message": message,
-                "breakdown": breakdown,
+                "result_id": result_id,
+                "total": len(stored.leads),
+                "leads": [lead_payload(lead) for lead in leads],
+                "next_cursor": encode_cursor(end) if end < len(stored.leads) else None,
+                "scoring_plan_version": stored.scoring_plan_version,
             }
         )
+    )
 
-    scored_rows.sort(key=lambda item: item["score"], reverse=True)
-
-    ai_enabled = bool(use_ai and ai_service.enabled)
-    if ai_enabled:
-        for row in scored_rows[: max(0, ai_limit)]:
-            ai_output = ai_service.generate_outreach(
-                brand_name=brand_name,
-                positioning=positioning,
-                company_name=row["company_name"],
-                city=row["city"],
-                state=row["state"],
-                services=row["services"],
-                description=row["description"],
-                tone=tone,
-                language=normalized_language,
-            )
-            if ai_output:
-                row["outreach_subject"], row["outreach_message"] = ai_output
-
-    lead_results: list[LeadResult] = []
-    for row in scored_rows:
-        breakdown = row["breakdown"]
-        lead_results.append(
-            LeadResult(
-                company_name=row["company_name"],
-                city=row["city"],
-                state=row["state"],
-                website=row["website"],
-                source=row["source"],
-                services=row["services"],
-                description=row["description"],
-                score=row["score"],
-                tier=row["tier"],
-                reason=row["reason"],
-                outreach_subject=row["outreach_subject"],
-                outreach_message=row["outreach_message"],
-                breakdown=LeadScoreBreakdown(
-                    industry_fit=breakdown.industry_fit,
-                    product_match=breakdown.product_match,
-                    digital_signal=breakdown.digital_signal,
-                    scale_signal=breakdown.scale_signal,
-                    intent_signal=breakdown.intent_signal,
-                    penalties=breakdown.penalties,
-                    total=breakdown.total,
-                ),
-            )
-        )
 
-    tier_a = sum(1 for item in scored_rows if item["tier"] == "A")
-    tier_b = sum(1 for item in scored_rows if item["tier"] == "B")
-    tier_c = sum(1 for item in scored_rows if item["tier"] == "C")
-
-    summary = Summary(
-        total_leads=len(scored_rows),
-        average_score=round(mean(item["score"] for item in scored_rows), 1),
-        tier_a=tier_a,
-        tier_b=tier_b,
-        tier_c=tier_c,
-        top_states=summarize_state_tiers([item["state"] for item in scored_rows if item["state"]]),
-    )
+def split_param(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
 
-    report_md = top_leads_markdown([lead.model_dump() for lead in lead_results], top_n=10, language=normalized_language)
 
-    return ProcessResponse(
-        brand_name=brand_name,
-        language=normalized_language,
-        use_ai=use_ai,
-        ai_enabled=ai_enabled,
-        leads=lead_results,
-        summary=summary,
-        top_leads_markdown=report_md,
-        generated_at=datetime.now(timezone.utc).isoformat(),
+@app.get("/api/leads/search", response_model=LeadSearchPage)
+def search_leads(
+    q: str = Query("", description="Words to match in description/services; a trailing * matches a prefix"),
+    state: str = Query("", description="Comma-separated states"),
+    tier: str = Query("", description="Comma-separated tiers"),
+    source: str = Query("", description="Comma-separated sources"),
+    min_score: Optional[int] = Query(None),
+    max_score: Optional[int] = Query(None),
+    since: str = Query("", description="ISO date or datetime; runs before it are skipped"),
+    run_id: str = Query(""),
+    cursor: str = Query(""),
+    limit: int = Query(50, ge=1, le=500),
+) -> Response:
+    if lead_store is None:
+        raise HTTPException(status_code=503, detail="The lead store is disabled.")
+    try:
+        since_at = datetime.fromisoformat(since) if since else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid since; use an ISO date such as 2026-01-31.") from exc
+    if since_at is not None and since_at.tzinfo is None:
+        since_at = since_at.replace(tzinfo=timezone.utc)
+    try:
+        after = decode_search_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+
+    leads, next_cursor = lead_store.search(
+        query=q,
+        states=split_param(state),
+        tiers=[value.upper() for value in split_param(tier)],
+        sources=split_param(source),
+        min_score=min_score,
+        max_score=max_score,
+        since=since_at.timestamp() if since_at is not None else None,
+        run_id=run_id,
+        limit=limit,
+        cursor=after,
     )
+    return json_response(dump_json({"leads": leads, "next_cursor": next_cursor}))
+
+
+def export_response(result_id: str, stored: StoredResult, fmt: str, gzip: bool) -> StreamingResponse:
+    # Written page by page from the ranked result; the whole file never exists in memory.
+    media_type = "application/gzip" if gzip else EXPORT_FORMATS[fmt][0]
+    headers = {
+        "Content-Disposition": f'attachment; filename="{export_filename(result_id, fmt, gzip)}"',
+        "X-Result-Id": result_id,
+    }
+    return StreamingResponse(export_chunks(stored, fmt, gzip), media_type=media_type, headers=headers)
+
+
+@app.get("/api/results/{result_id}/export")
+def export_result(
+    result_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson|markdown)$"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    stored = result_store.get(result_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired.")
+    return export_response(result_id, stored, format, gzip)
+
+
+@app.post("/api/export")
+async def export_upload(
+    file: UploadFile = File(...),
+    options: ProcessOptions = Depends(process_options),
+    format: str = Query("csv", pattern="^(csv|ndjson|markdown)$"),
+    gzip: bool = Query(False),
+) -> StreamingResponse:
+    # Same form as /api/process, answered with the export instead of the JSON body.
+    stream = checked_upload(file)
+    try:
+        result = await run_in_threadpool(
+            process_csv,
+            stream,
+            options,
+            ai_service=ai_service,
+            result_store=result_store,
+            plan=scoring_plans.current(),
+            pipeline="export",
+        )
+    except InputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    stored = result_store.get(result.result_id)
+    if stored is None:
+        raise HTTPException(status_code=503, detail="Result was evicted before it could be exported; try again.")
+    return export_response(result.result_id, stored, format, gzip)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterable
+
+
+def is_word_char(ch: str) -> bool:
+    # Same definition as `\w` in Python's `re` for str patterns.
+    return ch.isalnum() or ch == "_"
+
+
+@dataclass(frozen=True)
+class KeywordHits:
+    # Terms found anywhere in the text (plain substring semantics).
+    found: frozenset[str]
+    # Terms found at least once with a word boundary on both sides (`\bterm\b`).
+    words: frozenset[str]
+
+
+EMPTY_HITS = KeywordHits(found=frozenset(), words=frozenset())
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every term in one pass over the text."""
+
+    def __init__(self, terms: Iterable[str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[tuple[str, ...]] = [()]
+        for term in dict.fromkeys(t for t in terms if t):
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    outputs.append(())
+                    goto[state][ch] = nxt
+                state = nxt
+            outputs[state] += (term,)
+
+        # Breadth-first pass: compute failure links, then flatten them into a
+        # full transition table so the scan never has to follow fail links.
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [{} for _ in goto]
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            outputs[state] += outputs[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+
+        self.terms = frozenset(term for out in outputs for term in out)
+        self._delta = delta
+        self._outputs = outputs
+        self._last: tuple[str, KeywordHits] = ("", EMPTY_HITS)
+
+    def scan(self, text: str) -> KeywordHits:
+        # score_row and pick_offer_angle look at the same text back to back.
+        last_text, last_hits = self._last
+        if text == last_text:
+            return last_hits
+
+        delta = self._delta
+        outputs = self._outputs
+        found: set[str] = set()
+        words: set[str] = set()
+        size = len(text)
+        state = 0
+        for end, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            matched = outputs[state]
+            if not matched:
+                continue
+            after_ok = end + 1 == size or not is_word_char(text[end + 1])
+            for term in matched:
+                found.add(term)
+                if after_ok and term not in words:
+                    start = end - len(term) + 1
+                    if start == 0 or not is_word_char(text[start - 1]):
+                        words.add(term)
+
+        hits = KeywordHits(found=frozenset(found), words=frozenset(words))
+        self._last = (text, hits)
+        return hits
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Metrics are updated once per stage, model call or request (never per row), so a short
+# uncontended lock per update is all the hot path pays.
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+AI_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+REGISTRY: list[Metric] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _snapshot(self) -> list[tuple[tuple[str, ...], list[float]]]:
+        with self._lock:
+            return [(labels, list(values)) for labels, values in sorted(self._values.items())]
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            values = self._values.get(labels)
+            if values is None:
+                self._values[labels] = [amount]
+            else:
+                values[0] += amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            values = self._values.get(labels)
+            return values[0] if values else 0
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, values in self._snapshot():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(values[0])}")
+        return lines
+
+
+class HistogramMetric(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = STAGE_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, seconds: float, *labels: str) -> None:
+        # Per label set: one count per bucket (plus +Inf), then sum and count.
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            values = self._values.get(labels)
+            if values is None:
+                values = self._values[labels] = [0.0] * (len(self.buckets) + 3)
+            values[index] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, values in self._snapshot():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_number(values[-1])}")
+        return lines
+
+
+STAGE_SECONDS = HistogramMetric(
+    "sunny_stage_duration_seconds",
+    "Time spent in each stage of the lead pipelines.",
+    ("pipeline", "stage"),
+)
+ROWS_SCORED = CounterMetric("sunny_rows_scored_total", "Lead rows scored.", ("pipeline",))
+AI_REQUEST_SECONDS = HistogramMetric(
+    "sunny_ai_request_duration_seconds",
+    "Model request latency, including a temperature retry.",
+    ("model",),
+    AI_BUCKETS,
+)
+AI_FIRST_TOKEN_SECONDS = HistogramMetric(
+    "sunny_ai_first_token_seconds",
+    "Time to the first streamed output token.",
+    ("model",),
+    AI_BUCKETS,
+)
+AI_REQUESTS = CounterMetric("sunny_ai_requests_total", "Model requests by outcome (ok, empty, error).", ("model", "outcome"))
+AI_TEMPERATURE_RETRIES = CounterMetric(
+    "sunny_ai_temperature_retries_total",
+    "Model requests retried without temperature after the model rejected it.",
+    ("model",),
+)
+AI_HEDGED_REQUESTS = CounterMetric(
+    "sunny_ai_hedged_requests_total",
+    "Backup model requests sent after the hedging delay (sent), and how many answered first (won).",
+    ("model", "result"),
+)
+AI_CACHE_HITS = CounterMetric("sunny_ai_cache_hits_total", "Model outputs served from the prompt cache.", ("model",))
+
+
+# Stage timings of the current HTTP request, for its Server-Timing header.
+_request_stages: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar("request_stages", default=None)
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, pipeline, stage)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((stage, seconds))
+
+
+@contextmanager
+def stage_timer(pipeline: str, stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(pipeline, stage, time.perf_counter() - start)
+
+
+@contextmanager
+def collect_stages() -> Iterator[list[tuple[str, float]]]:
+    # Work started inside (including run_in_threadpool calls, which copy the context)
+    # appends its stage timings to the yielded list.
+    stages: list[tuple[str, float]] = []
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 
 class LeadScoreBreakdown(BaseModel):
@@ -28,6 +28,14 @@ class LeadResult(BaseModel):
     breakdown: LeadScoreBreakdown
 
 
+class StateTierCounts(BaseModel):
+    state: str
+    total: int
+    tier_a: int
+    tier_b: int
+    tier_c: int
+
+
 class Summary(BaseModel):
     total_leads: int
     average_score: float
@@ -35,6 +43,27 @@ class Summary(BaseModel):
     tier_b: int
     tier_c: int
     top_states: List[dict[str, int]]
+    score_quantiles: dict[str, float] = Field(default_factory=dict, description="p10, p25, p50, p75, p90, p99")
+    state_tiers: List[StateTierCounts] = Field(default_factory=list)
+    component_averages: dict[str, float] = Field(default_factory=dict)
+
+
+class DuplicateRow(BaseModel):
+    row: int = Field(description="Data row number in the upload; 1 is the first row after the header")
+    company_name: str
+    similarity: float
+
+
+class DuplicateGroup(BaseModel):
+    row: int = Field(description="The kept row")
+    company_name: str
+    merged: List[DuplicateRow]
+
+
+class DedupeReport(BaseModel):
+    rows_in: int
+    rows_kept: int
+    groups: List[DuplicateGroup]
 
 
 class ProcessResponse(BaseModel):
@@ -46,6 +75,53 @@ class ProcessResponse(BaseModel):
     summary: Summary
     top_leads_markdown: str
     generated_at: str = Field(description="ISO datetime")
+    result_id: str = ""
+    next_cursor: Optional[str] = None
+    scoring_plan_version: str = ""
+    duplicates: Optional[DedupeReport] = None
+
+
+class StoredLead(LeadResult):
+    run_id: str
+    rank: int
+    created_at: str = Field(description="ISO datetime of the run")
+
+
+class LeadSearchPage(BaseModel):
+    leads: List[StoredLead]
+    next_cursor: Optional[str] = None
+
+
+class LeadPage(BaseModel):
+    result_id: str
+    total: int
+    leads: List[LeadResult]
+    next_cursor: Optional[str] = None
+    scoring_plan_version: str = ""
+
+
+class JobCreated(BaseModel):
+    job_id: str
+    status: str
+
+
+class DatasetInfo(BaseModel):
+    dataset_id: str
+    rows: int
+    created: bool
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    rows_parsed: int = 0
+    rows_scored: int = 0
+    ai_drafts_done: int = 0
+    ai_drafts_total: int = 0
+    error: str = ""
+    created_at: str = Field(description="ISO datetime")
+    updated_at: str = Field(description="ISO datetime")
+    result: Optional[ProcessResponse] = None
 
 
 class RefineRequest(BaseModel):
@@ -61,6 +137,7 @@ class RefineRequest(BaseModel):
     current_subject: str
     current_message: str
     feedback: str
+    use_cache: bool = True
 
 
 class RefineResponse(BaseModel):
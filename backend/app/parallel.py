@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from .aggregates import LeadAggregate
+from .metrics import ROWS_SCORED, observe_stage
+from .records import LeadRecord
+from .scoring import ScoringPlan, score_lead
+from .settings import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def scoring_worker_count() -> int:
+    return settings.scoring_workers if settings.scoring_workers > 0 else (os.cpu_count() or 1)
+
+
+def _warm(_: int) -> int:
+    return os.getpid()
+
+
+def get_scoring_pool() -> Optional[ProcessPoolExecutor]:
+    # One persistent pool per API process; None when parallel scoring is off.
+    global _pool
+    if settings.parallel_scoring_min_rows <= 0 or scoring_worker_count() < 2:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a server process that already runs threads is not safe.
+            _pool = ProcessPoolExecutor(
+                max_workers=scoring_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def warm_scoring_pool() -> None:
+    pool = get_scoring_pool()
+    if pool is not None:
+        # Start every worker and import the scoring module before the first big upload.
+        list(pool.map(_warm, range(scoring_worker_count())))
+
+
+def shutdown_scoring_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def score_chunk(
+    rows: list[dict],
+    normalized_states: set[str],
+    normalized_language: str,
+    brand_name: str,
+    plan: ScoringPlan,
+    offset: int = 0,
+) -> tuple[list[LeadRecord], LeadAggregate]:
+    # The chunk's summary is built where it is scored; offset is its first row's upload index.
+    scored = [score_lead(row, normalized_states, normalized_language, brand_name, plan) for row in rows]
+    return scored, LeadAggregate().add(scored, offset)
+
+
+def score_rows(
+    rows: Iterable[dict],
+    normalized_states: set[str],
+    normalized_language: str,
+    brand_name: str,
+    plan: ScoringPlan,
+    report: Callable[..., None],
+    pipeline: str,
+) -> tuple[list[LeadRecord], LeadAggregate]:
+    # Rows are scored in upload order either way, so rankings and ties match the
+    # sequential path exactly. Until parallel_scoring_min_rows rows have been
+    # parsed, chunks are held back; small uploads never touch the pool.
+    # Metrics: "score" is time spent scoring (or waiting on the pool), "parse" the rest.
+    chunk_rows = max(1, settings.parallel_chunk_rows)
+    pool = get_scoring_pool()
+    max_in_flight = scoring_worker_count() * 2
+
+    scored: list[LeadRecord] = []
+    aggregate = LeadAggregate()
+    held: list[list[dict]] = []
+    in_flight: deque[Future] = deque()
+    chunk: list[dict] = []
+    parsed = 0
+    dispatched = 0
+    parallel = False
+    started = time.perf_counter()
+    score_seconds = 0.0
+
+    def take(chunk_scored: list[LeadRecord], chunk_aggregate: LeadAggregate) -> None:
+        scored.extend(chunk_scored)
+        aggregate.merge(chunk_aggregate)
+
+    def score_here(batch: list[dict]) -> None:
+        nonlocal score_seconds
+        start = time.perf_counter()
+        take(*score_chunk(batch, normalized_states, normalized_language, brand_name, plan, len(scored)))
+        score_seconds += time.perf_counter() - start
+        report(rows_scored=len(scored))
+
+    def collect(future: Future) -> None:
+        nonlocal score_seconds
+        start = time.perf_counter()
+        take(*future.result())
+        score_seconds += time.perf_counter() - start
+        report(rows_scored=len(scored))
+
+    def dispatch(batch: list[dict]) -> None:
+        nonlocal dispatched
+        in_flight.append(pool.submit(score_chunk, batch, normalized_states, normalized_language, brand_name, plan, dispatched))
+        dispatched += len(batch)
+        while len(in_flight) > max_in_flight:
+            collect(in_flight.popleft())
+
+    for row in rows:
+        chunk.append(row)
+        parsed += 1
+        if len(chunk) < chunk_rows:
+            continue
+        report(rows_parsed=parsed)
+        if pool is None:
+            score_here(chunk)
+        elif parsed < settings.parallel_scoring_min_rows:
+            held.append(chunk)
+        else:
+            parallel = True
+            for batch in held:
+                dispatch(batch)
+            held = []
+            dispatch(chunk)
+        chunk = []
+
+    report(rows_parsed=parsed)
+    held.append(chunk)
+    if parallel:
+        for batch in held:
+            dispatch(batch)
+        while in_flight:
+            collect(in_flight.popleft())
+    else:
+        for batch in held:
+            score_here(batch)
+
+    observe_stage(pipeline, "parse", time.perf_counter() - started - score_seconds)
+    observe_stage(pipeline, "score", score_seconds)
+    ROWS_SCORED.inc(pipeline, amount=len(scored))
+    return scored, aggregate
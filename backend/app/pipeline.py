@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from csv import Error as CSVError
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Callable, Iterable, Optional
+
+from .aggregates import LeadAggregate
+from .ai_service import AIService
+from .datasets import Dataset, DatasetLeads, DatasetStore
+from .dedupe import dedupe_rows
+from .ingest import iter_csv_rows
+from .metrics import ROWS_SCORED, stage_timer
+from .models import DedupeReport, Summary
+from .parallel import score_rows
+from .records import DRAFT_FIELDS, ECHOED_FIELDS, LEAD_FIELDS, LEAD_VIEWS, LeadRecord, dump_json, lead_payload
+from .reporting import top_leads_markdown
+from .results import RankedLeads, ResultStore, encode_cursor
+from .scoring import ScoringPlan
+from .settings import settings
+
+# Called with keyword counters, e.g. progress(rows_parsed=1000, rows_scored=1000).
+ProgressFn = Callable[..., None]
+
+
+class InputError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ProcessOptions:
+    target_states: str = "AZ,CA,TX,FL,NY"
+    brand_name: str = "Sunny Home"
+    positioning: str = "Mid-to-high-end furniture and lighting for premium projects."
+    tone: str = "confident, practical, consultative"
+    language: str = "EN"
+    use_ai: bool = False
+    ai_limit: int = 10
+    ai_cache: bool = True
+    ai_batch: bool = False
+    # Merge near-duplicate rows before scoring (process and jobs; rescores ignore it).
+    dedupe: bool = False
+    page_size: int = 0
+    # Response shape only: "compact" drops echoed input columns and the drafts below
+    # the first draft_rows leads; fields is a comma-separated subset of LEAD_FIELDS.
+    view: str = "full"
+    fields: str = ""
+    draft_rows: int = 25
+
+    @property
+    def normalized_language(self) -> str:
+        return "CN" if str(self.language).strip().upper() == "CN" else "EN"
+
+    @property
+    def normalized_states(self) -> set[str]:
+        return {s.strip().upper() for s in self.target_states.split(",") if s.strip()}
+
+    @property
+    def compact(self) -> bool:
+        return self.view.strip().lower() == "compact"
+
+    def lead_keys(self) -> Optional[tuple[str, ...]]:
+        # Lead keys to serialize, or None for all of them.
+        if self.view.strip().lower() not in LEAD_VIEWS:
+            raise InputError(f"Unknown view {self.view!r}; expected one of: {', '.join(LEAD_VIEWS)}.")
+        requested = {name.strip() for name in self.fields.split(",") if name.strip()}
+        unknown = sorted(requested.difference(LEAD_FIELDS))
+        if unknown:
+            raise InputError(f"Unknown lead field(s): {', '.join(unknown)}.")
+        keys = tuple(
+            name
+            for name in LEAD_FIELDS
+            if (not requested or name in requested) and not (self.compact and name in ECHOED_FIELDS)
+        )
+        return None if len(keys) == len(LEAD_FIELDS) else keys
+
+
+@dataclass
+class ProcessResult:
+    brand_name: str
+    language: str
+    use_ai: bool
+    ai_enabled: bool
+    leads: list[LeadRecord]
+    summary: Summary
+    top_leads_markdown: str
+    generated_at: str
+    result_id: str
+    next_cursor: Optional[str]
+    scoring_plan_version: str
+    duplicates: Optional[DedupeReport] = None
+    # Metrics label only; not part of the response.
+    pipeline: str = "process"
+    # From ProcessOptions.lead_keys(); leads past draft_rows are sent without drafts.
+    lead_keys: Optional[tuple[str, ...]] = None
+    draft_rows: Optional[int] = None
+
+    def to_json(self) -> bytes:
+        # Written straight from the lead records; same JSON shape as models.ProcessResponse.
+        with stage_timer(self.pipeline, "serialize"):
+            return self._dump()
+
+    def _dump(self) -> bytes:
+        return dump_json(
+            {
+                "brand_name": self.brand_name,
+                "language": self.language,
+                "use_ai": self.use_ai,
+                "ai_enabled": self.ai_enabled,
+                "leads": self._lead_payloads(),
+                "summary": self.summary.model_dump(),
+                "top_leads_markdown": self.top_leads_markdown,
+                "generated_at": self.generated_at,
+                "result_id": self.result_id,
+                "next_cursor": self.next_cursor,
+                "scoring_plan_version": self.scoring_plan_version,
+                "duplicates": self.duplicates.model_dump() if self.duplicates is not None else None,
+            }
+        )
+
+    def _lead_payloads(self) -> list[dict[str, Any]]:
+        if self.lead_keys is None and self.draft_rows is None:
+            return [lead_payload(lead) for lead in self.leads]
+        payloads = []
+        for rank, lead in enumerate(self.leads):
+            payload = lead_payload(lead)
+            if self.lead_keys is not None:
+                payload = {name: payload[name] for name in self.lead_keys}
+            if self.draft_rows is not None and rank >= self.draft_rows:
+                for name in DRAFT_FIELDS:
+                    payload.pop(name, None)
+            payloads.append(payload)
+        return payloads
+
+
+def process_csv(
+    stream: BinaryIO,
+    options: ProcessOptions,
+    *,
+    ai_service: AIService,
+    result_store: ResultStore,
+    plan: ScoringPlan,
+    progress: Optional[ProgressFn] = None,
+    pipeline: str = "process",
+) -> ProcessResult:
+    # `pipeline` labels the stage metrics: "process", "job" or "export".
+    report = progress or (lambda **counts: None)
+
+    # Rows are parsed from the upload chunk by chunk and scored as they arrive
+    # (on the scoring pool for large uploads); only the response fields are kept.
+    try:
+        rows: Iterable[dict[str, str]] = iter_csv_rows(stream, settings.csv_chunk_size)
+        duplicates = None
+        if options.dedupe:
+            # Needs every row up front, so this stage includes reading the upload.
+            with stage_timer(pipeline, "dedupe"):
+                rows, duplicates = dedupe_rows(
+                    list(rows),
+                    threshold=settings.dedupe_threshold,
+                    bands=settings.dedupe_bands,
+                    band_rows=settings.dedupe_band_rows,
+                )
+        scored_rows, aggregate = score_rows(
+            rows,
+            options.normalized_states,
+            options.normalized_language,
+            options.brand_name,
+            plan,
+            report,
+            pipeline,
+        )
+    except (UnicodeDecodeError, CSVError) as exc:
+        raise InputError(f"Could not parse CSV: {exc}") from exc
+
+    if not scored_rows:
+        raise InputError("CSV has no data rows.")
+
+    # Only the AI rows, the report and the first page need ranking up front;
+    # deeper pages are ranked on demand from the stored result.
+    return build_result(
+        RankedLeads(scored_rows),
+        aggregate,
+        options,
+        plan,
+        ai_service=ai_service,
+        result_store=result_store,
+        progress=report,
+        pipeline=pipeline,
+        duplicates=duplicates,
+    )
+
+
+def register_dataset(stream: BinaryIO, dataset_store: DatasetStore, plan: ScoringPlan) -> tuple[Dataset, bool]:
+    try:
+        with stage_timer("dataset", "ingest"):
+            dataset, created = dataset_store.ingest(stream, settings.csv_chunk_size, plan)
+    except (UnicodeDecodeError, CSVError) as exc:
+        raise InputError(f"Could not parse CSV: {exc}") from exc
+    if dataset is None:
+        raise InputError("CSV has no data rows.")
+    return dataset, created
+
+
+def rescore_dataset(
+    dataset: Dataset,
+    options: ProcessOptions,
+    *,
+    ai_service: AIService,
+    result_store: ResultStore,
+    plan: ScoringPlan,
+) -> ProcessResult:
+    # Keyword hits and every state-independent score part were computed at upload;
+    # only the state bonus, totals and ranking are redone here.
+    with stage_timer("rescore", "score"):
+        ranked = dataset.rescore(plan, options.normalized_states, options.normalized_language, options.brand_name)
+        aggregate = ranked.aggregate()
+    ROWS_SCORED.inc("rescore", amount=len(ranked))
+    return build_result(
+        ranked,
+        aggregate,
+        options,
+        plan,
+        ai_service=ai_service,
+        result_store=result_store,
+        pipeline="rescore",
+    )
+
+
+def build_result(
+    ranked: RankedLeads | DatasetLeads,
+    aggregate: LeadAggregate,
+    options: ProcessOptions,
+    plan: ScoringPlan,
+    *,
+    ai_service: AIService,
+    result_store: ResultStore,
+    progress: Optional[ProgressFn] = None,
+    pipeline: str = "process",
+    duplicates: Optional[DedupeReport] = None,
+) -> ProcessResult:
+    normalized_language = options.normalized_language
+    report = progress or (lambda **counts: None)
+
+    ai_enabled = bool(options.use_ai and ai_service.enabled)
+    if ai_enabled:
+        with stage_timer(pipeline, "ai"):
+            ai_rows = ranked.top(options.ai_limit)
+            report(ai_drafts_total=len(ai_rows))
+            ai_outputs = ai_service.generate_outreach_many(
+                ai_rows,
+                brand_name=options.brand_name,
+                positioning=options.positioning,
+                tone=options.tone,
+                language=normalized_language,
+                use_cache=options.ai_cache,
+                batch=options.ai_batch,
+                progress=lambda done: report(ai_drafts_done=done),
+            )
+        for lead, ai_output in zip(ai_rows, ai_outputs):
+            if ai_output:
+                lead.outreach_subject, lead.outreach_message = ai_output
+
+    with stage_timer(pipeline, "rank"):
+        page_rows = ranked.top(options.page_size) if options.page_size > 0 else ranked.ranked()
+        report_rows = ranked.top(10)
+
+    with stage_timer(pipeline, "summary"):
+        summary = aggregate.summary()
+
+    with stage_timer(pipeline, "markdown"):
+        report_md = top_leads_markdown(report_rows, top_n=10, language=normalized_language)
+    result_id = result_store.put(ranked, normalized_language, plan.version)
+
+    return ProcessResult(
+        brand_name=options.brand_name,
+        language=normalized_language,
+        use_ai=options.use_ai,
+        ai_enabled=ai_enabled,
+        leads=page_rows,
+        summary=summary,
+        top_leads_markdown=report_md,
+        generated_at=datetime.now(timezone.utc).isoformat(),
+        result_id=result_id,
+        next_cursor=encode_cursor(len(page_rows)) if len(page_rows) < len(ranked) else None,
+        scoring_plan_version=plan.version,
+        duplicates=duplicates,
+        pipeline=pipeline,
+        lead_keys=options.lead_keys(),
+        draft_rows=max(0, options.draft_rows) if options.compact else None,
+    )
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .scoring import DEFAULT_PLAN, ScoringPlan, compile_plan
+
+try:
+    import yaml
+except Exception:  # pragma: no cover
+    yaml = None
+
+
+def load_plan(path: str) -> ScoringPlan:
+    raw = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix.lower() in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError("YAML scoring plans require PyYAML.")
+        spec = yaml.safe_load(raw)
+    else:
+        spec = json.loads(raw)
+    if not isinstance(spec, dict):
+        raise ValueError("Scoring plan must be an object.")
+    return compile_plan(spec)
+
+
+class PlanStore:
+    """Serves the current scoring plan and swaps in a new one when its file changes."""
+
+    def __init__(self, path: str, check_interval: float = 1.0) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._plan: ScoringPlan = DEFAULT_PLAN
+        self._signature: Optional[tuple[int, int]] = None
+        self._checked = float("-inf")
+        self._loaded_at: Optional[float] = None
+        self._error: Optional[str] = None
+        self._lock = threading.Lock()
+        self.current()
+
+    def current(self) -> ScoringPlan:
+        # A stat() at most every check_interval seconds; callers hold on to the plan they
+        # got, so one request is scored with one plan even if the file changes meanwhile.
+        if time.monotonic() - self._checked >= self.check_interval:
+            with self._lock:
+                if time.monotonic() - self._checked >= self.check_interval:
+                    self._reload_if_changed()
+                    self._checked = time.monotonic()
+        return self._plan
+
+    def _reload_if_changed(self) -> None:
+        if not self.path:
+            return
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # No plan file: keep serving whatever plan was loaded last (the built-in one at first).
+            self._signature = None
+            return
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+        self._signature = signature
+        try:
+            plan = load_plan(self.path)
+        except (OSError, ValueError) as exc:
+            # A bad edit keeps the previous plan in service.
+            self._error = f"{type(exc).__name__}: {exc}"
+            return
+        self._plan = plan
+        self._loaded_at = time.time()
+        self._error = None
+
+    def snapshot(self) -> dict[str, Any]:
+        plan = self.current()
+        return {
+            "version": plan.version,
+            "digest": plan.digest,
+            "path": self.path,
+            "loaded_at": self._loaded_at,
+            "error": self._error,
+        }
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import HTTPException, Request, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import collect_stages
+from .settings import settings
+
+T = TypeVar("T")
+
+# ?profile=<format> or an X-Profile: <format> header; "1"/"true" mean text.
+PROFILE_FORMATS = ("text", "prof")
+PRODUCTION_ENVS = ("production", "prod")
+
+# The profiler hooks are process-wide (sys.monitoring on 3.12+), so only one profile runs at a time.
+_profile_lock = threading.Lock()
+
+
+def profiling_allowed() -> bool:
+    return settings.app_env.strip().lower() not in PRODUCTION_ENVS
+
+
+class RequestProfile:
+    """cProfile for the blocking parts of one request; a no-op unless enabled."""
+
+    def __init__(self, fmt: Optional[str] = None) -> None:
+        self.format = fmt
+        self.enabled = fmt is not None
+        self._profiler = cProfile.Profile() if self.enabled else None
+
+    def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # Runs in whichever thread calls it, so wrap the function handed to the threadpool.
+        if self._profiler is None:
+            return fn(*args, **kwargs)
+        if not _profile_lock.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="Another request is already being profiled; retry shortly.")
+        try:
+            self._profiler.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._profiler.disable()
+        finally:
+            _profile_lock.release()
+
+    def response(self) -> Response:
+        stats = pstats.Stats(self._profiler)
+        if self.format == "prof":
+            # Same bytes as pstats.Stats.dump_stats(); open with snakeviz, flameprof or `python -m pstats`.
+            return Response(
+                content=marshal.dumps(stats.stats),
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": 'attachment; filename="request.prof"'},
+            )
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(60)
+        return Response(content=out.getvalue(), media_type="text/plain; charset=utf-8")
+
+
+def request_profile(request: Request) -> RequestProfile:
+    value = (request.query_params.get("profile") or request.headers.get("x-profile") or "").strip().lower()
+    if not value or value in ("0", "false") or not profiling_allowed():
+        return RequestProfile()
+    return RequestProfile("text" if value in ("1", "true") or value not in PROFILE_FORMATS else value)
+
+
+def server_timing(stages: list[tuple[str, float]], total: float) -> str:
+    durations: dict[str, float] = defaultdict(float)
+    for stage, seconds in stages:
+        durations[stage] += seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in durations.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header with the pipeline stages that ran for the request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with collect_stages() as stages:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    header = server_timing(stages, time.perf_counter() - start)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
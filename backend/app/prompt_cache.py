@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+def prompt_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """Two-tier (memory LRU + SQLite) cache of model outputs keyed by model and prompt."""
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: Optional[str], *, ttl_seconds: float, memory_entries: int, disk_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = max(0, memory_entries)
+        self.disk_entries = max(0, disk_entries)
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path and self.disk_entries:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS prompt_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS prompt_cache_accessed ON prompt_cache(accessed_at)")
+                self._db.commit()
+            except sqlite3.Error:
+                # Fall back to memory-only rather than breaking AI calls.
+                self._db = None
+
+    def _fresh(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds <= 0 or now - created_at < self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._fresh(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT value, created_at FROM prompt_cache WHERE key = ?", (key,)).fetchone()
+                    if row is not None and self._fresh(row[1], now):
+                        self._db.execute("UPDATE prompt_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, row[1], row[0])
+                        self.stats["disk_hits"] += 1
+                        return row[0]
+                except sqlite3.Error:
+                    pass
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self.stats["writes"] += 1
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO prompt_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(now)
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["memory_evictions"] += 1
+
+    def _prune(self, now: float) -> None:
+        removed = 0
+        if self.ttl_seconds > 0:
+            removed += self._db.execute("DELETE FROM prompt_cache WHERE created_at <= ?", (now - self.ttl_seconds,)).rowcount
+        (count,) = self._db.execute("SELECT COUNT(*) FROM prompt_cache").fetchone()
+        if count > self.disk_entries:
+            removed += self._db.execute(
+                "DELETE FROM prompt_cache WHERE key IN (SELECT key FROM prompt_cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.disk_entries,),
+            ).rowcount
+        self.stats["disk_evictions"] += max(0, removed)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._memory)}
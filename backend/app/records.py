@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
+
+
+@dataclass(slots=True)
+class LeadRecord:
+    # One scored lead, used from scoring through ranking, AI drafting, reporting and
+    # serialization. The score breakdown is stored flat; `score` is its clamped total.
+    company_name: str
+    city: str
+    state: str
+    website: str
+    source: str
+    services: str
+    description: str
+    score: int
+    tier: str
+    reason: str
+    outreach_subject: str
+    outreach_message: str
+    industry_fit: int
+    product_match: int
+    digital_signal: int
+    scale_signal: int
+    intent_signal: int
+    penalties: int
+
+
+# Keys of lead_payload, in order. Compact views drop the columns echoed back from the
+# upload, and the drafts for rows below the first few.
+LEAD_FIELDS = (
+    "company_name",
+    "city",
+    "state",
+    "website",
+    "source",
+    "services",
+    "description",
+    "score",
+    "tier",
+    "reason",
+    "outreach_subject",
+    "outreach_message",
+    "breakdown",
+)
+ECHOED_FIELDS = ("services", "description")
+DRAFT_FIELDS = ("outreach_subject", "outreach_message")
+LEAD_VIEWS = ("full", "compact")
+
+
+def lead_payload(lead: LeadRecord) -> dict[str, Any]:
+    # Same shape as models.LeadResult.
+    return {
+        "company_name": lead.company_name,
+        "city": lead.city,
+        "state": lead.state,
+        "website": lead.website,
+        "source": lead.source,
+        "services": lead.services,
+        "description": lead.description,
+        "score": lead.score,
+        "tier": lead.tier,
+        "reason": lead.reason,
+        "outreach_subject": lead.outreach_subject,
+        "outreach_message": lead.outreach_message,
+        "breakdown": {
+            "industry_fit": lead.industry_fit,
+            "product_match": lead.product_match,
+            "digital_signal": lead.digital_signal,
+            "scale_signal": lead.scale_signal,
+            "intent_signal": lead.intent_signal,
+            "penalties": lead.penalties,
+            "total": lead.score,
+        },
+    }
+
+
+def dump_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
+from .records import LeadRecord
 
-def top_leads_markdown(leads: list[dict], top_n: int = 10, language: str = "EN") -> str:
+
+def report_header(language: str = "EN") -> list[str]:
     cn = language.upper() == "CN"
-    top_rows = leads[:top_n]
-    lines = [
+    return [
         "# 高优先级线索 + 外联草稿" if cn else "# Top Leads + Outreach Drafts",
         "",
         (
@@ -17,20 +18,25 @@ def top_leads_markdown(leads: list[dict], top_n: int = 10, language: str = "EN")
         "",
     ]
 
-    for idx, lead in enumerate(top_rows, start=1):
-        lines.extend(
-            [
-                f"## {idx}. {lead['company_name']} ({lead['city']}, {lead['state']})",
-                (f"- 评分: **{lead['score']}** (等级 {lead['tier']})" if cn else f"- Score: **{lead['score']}** (Tier {lead['tier']})"),
-                (f"- 原因: {lead['reason']}" if cn else f"- Why: {lead['reason']}"),
-                (f"- 网站: {lead['website']}" if cn else f"- Website: {lead['website']}"),
-                (f"- 标题: {lead['outreach_subject']}" if cn else f"- Subject: {lead['outreach_subject']}"),
-                "- 外联草稿:" if cn else "- Outreach Draft:",
-                "```text",
-                lead["outreach_message"],
-                "```",
-                "",
-            ]
-        )
 
+def lead_section(idx: int, lead: LeadRecord, language: str = "EN") -> list[str]:
+    cn = language.upper() == "CN"
+    return [
+        f"## {idx}. {lead.company_name} ({lead.city}, {lead.state})",
+        (f"- 评分: **{lead.score}** (等级 {lead.tier})" if cn else f"- Score: **{lead.score}** (Tier {lead.tier})"),
+        (f"- 原因: {lead.reason}" if cn else f"- Why: {lead.reason}"),
+        (f"- 网站: {lead.website}" if cn else f"- Website: {lead.website}"),
+        (f"- 标题: {lead.outreach_subject}" if cn else f"- Subject: {lead.outreach_subject}"),
+        "- 外联草稿:" if cn else "- Outreach Draft:",
+        "```text",
+        lead.outreach_message,
+        "```",
+        "",
+    ]
+
+
+def top_leads_markdown(leads: list[LeadRecord], top_n: int = 10, language: str = "EN") -> str:
+    lines = report_header(language)
+    for idx, lead in enumerate(leads[:top_n], start=1):
+        lines.extend(lead_section(idx, lead, language))
     return "\n".join(lines)
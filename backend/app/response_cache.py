@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, BinaryIO, Optional
+
+from .pipeline import ProcessOptions
+
+# Options that change how a response is produced but not what it contains.
+UNKEYED_OPTIONS = ("ai_cache",)
+
+
+def upload_digest(stream: BinaryIO, chunk_size: int) -> str:
+    digest = hashlib.sha256()
+    while chunk := stream.read(chunk_size):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def process_cache_key(upload: str, options: ProcessOptions, plan_digest: str, ai_backend: str = "") -> str:
+    # ai_backend identifies the model that would write the drafts ("" when AI is off or unavailable).
+    fields = {name: value for name, value in asdict(options).items() if name not in UNKEYED_OPTIONS}
+    material = json.dumps([upload, fields, plan_digest, ai_backend], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison.
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    result_id: str
+    expires_at: float
+
+
+class ResponseCache:
+    """In-memory LRU of serialized /api/process responses, bounded by entry count and total bytes."""
+
+    def __init__(self, *, max_entries: int, max_bytes: int, ttl_seconds: float, ai_ttl_seconds: float) -> None:
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.ai_ttl_seconds = ai_ttl_seconds
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.time():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key: str, body: bytes, result_id: str, *, ai: bool) -> CachedResponse:
+        ttl = self.ai_ttl_seconds if ai else self.ttl_seconds
+        entry = CachedResponse(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            result_id=result_id,
+            expires_at=time.time() + ttl if ttl > 0 else float("inf"),
+        )
+        if len(body) > self.max_bytes:
+            # Larger than the whole cache; serve it once but never store it.
+            return entry
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+        return entry
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= len(self._entries.pop(key).body)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "bytes": self._bytes}
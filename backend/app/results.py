@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Iterator, Optional
+
+from .records import LeadRecord
+
+score_key = attrgetter("score")
+
+
+class RankedLeads:
+    """Scored leads ranked by score, sorting only as much as callers need."""
+
+    def __init__(self, rows: list[LeadRecord]) -> None:
+        self._rows = rows
+        self._ranked: Optional[list[LeadRecord]] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def top(self, k: int) -> list[LeadRecord]:
+        k = max(0, k)
+        if self._ranked is not None or k >= len(self._rows):
+            return self.ranked()[:k]
+        # Same order as sorted(..., reverse=True)[:k], ties keep upload order.
+        return heapq.nlargest(k, self._rows, key=score_key)
+
+    def ranked(self) -> list[LeadRecord]:
+        if self._ranked is None:
+            self._ranked = sorted(self._rows, key=score_key, reverse=True)
+        return self._ranked
+
+    def page(self, offset: int, limit: int) -> list[LeadRecord]:
+        if offset <= 0:
+            return self.top(limit)
+        # Someone is paging through the result: sort once and keep it.
+        return self.ranked()[offset : offset + limit]
+
+    def iter_pages(self, size: int) -> Iterator[list[LeadRecord]]:
+        ranked = self.ranked()
+        for offset in range(0, len(ranked), max(1, size)):
+            yield ranked[offset : offset + size]
+
+
+@dataclass
+class StoredResult:
+    # RankedLeads, or any view with the same len/top/ranked/page/iter_pages interface.
+    leads: RankedLeads
+    language: str
+    scoring_plan_version: str = ""
+    created_at: float = field(default_factory=time.time)
+
+
+class ResultStore:
+    """In-memory LRU of recent ranked results, addressable by result id."""
+
+    def __init__(self, max_results: int, ttl_seconds: float) -> None:
+        self.max_results = max(1, max_results)
+        self.ttl_seconds = ttl_seconds
+        self._results: OrderedDict[str, StoredResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, leads: RankedLeads, language: str, scoring_plan_version: str = "") -> str:
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[result_id] = StoredResult(leads=leads, language=language, scoring_plan_version=scoring_plan_version)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        with self._lock:
+            stored = self._results.get(result_id)
+            if stored is None:
+                return None
+            if self.ttl_seconds > 0 and time.time() - stored.created_at > self.ttl_seconds:
+                del self._results[result_id]
+                return None
+            self._results.move_to_end(result_id)
+            return stored
+
+
+def encode_cursor(offset: int) -> str:
+    return str(offset)
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    offset = int(cursor)
+    if offset < 0:
+        raise ValueError("cursor must not be negative")
+    return offset
@@ -2,8 +2,20 @@ from __future__ import annotations
 
 from collections import Counter
 from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import json
 import re
-from typing import Iterable
+from types import MappingProxyType
+from typing import Any, Container, Iterable, Mapping, Optional
+
+from .matching import KeywordHits, KeywordMatcher, is_word_char
+from .records import LeadRecord
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None
 
 
 FIT_KEYWORDS = {
@@ -50,6 +62,121 @@ SERVICE_BONUS = {
     "interior architecture": 8,
 }
 
+# Plain substring checks used by product_match and pick_offer_angle.
+PRODUCT_TERMS = {
+    "lighting": 10,
+    "furniture": 10,
+    "decor": 4,
+}
+
+ANGLE_TERMS = ("hospitality", "hotel", "staging", "model home", "lighting")
+
+SCORE_CAPS = {
+    "industry_fit": 40,
+    "product_match": 20,
+    "digital_signal": 15,
+    "scale_signal": 15,
+    "intent_signal": 10,
+    "penalties": 0,
+}
+
+TIER_THRESHOLDS = {"A": 75, "B": 55}
+
+PLAN_TABLES = ("fit_keywords", "intent_keywords", "negative_keywords", "service_bonus", "product_terms")
+
+
+@dataclass(frozen=True)
+class ScoringPlan:
+    # Weight tables, caps and tier thresholds compiled once with their keyword matcher.
+    version: str
+    digest: str
+    spec_json: str
+    fit_keywords: Mapping[str, int]
+    intent_keywords: Mapping[str, int]
+    negative_keywords: Mapping[str, int]
+    service_bonus: Mapping[str, int]
+    product_terms: Mapping[str, int]
+    caps: Mapping[str, int]
+    tier_a: int
+    tier_b: int
+    matcher: KeywordMatcher
+    # Single-word matcher terms that `\b...\b` can be answered for from the scan alone.
+    word_terms: frozenset
+
+    def __reduce__(self):
+        # Sent to scoring workers as its spec; each worker compiles a given plan once.
+        return plan_from_json, (self.spec_json,)
+
+
+def default_plan_spec() -> dict[str, Any]:
+    return {
+        "version": "builtin",
+        "fit_keywords": dict(FIT_KEYWORDS),
+        "intent_keywords": dict(INTENT_KEYWORDS),
+        "negative_keywords": dict(NEGATIVE_KEYWORDS),
+        "service_bonus": dict(SERVICE_BONUS),
+        "product_terms": dict(PRODUCT_TERMS),
+        "caps": dict(SCORE_CAPS),
+        "tier_thresholds": dict(TIER_THRESHOLDS),
+    }
+
+
+def _weight_table(value: Any, name: str) -> dict[str, int]:
+    if not isinstance(value, dict):
+        raise ValueError(f"Scoring plan '{name}' must be an object of term -> integer.")
+    table: dict[str, int] = {}
+    for key, weight in value.items():
+        term = str(key).strip().lower()
+        if not term or isinstance(weight, bool) or not isinstance(weight, int):
+            raise ValueError(f"Scoring plan '{name}' has an invalid entry: {key!r}: {weight!r}.")
+        table[term] = weight
+    return table
+
+
+def compile_plan(spec: dict[str, Any]) -> ScoringPlan:
+    # Sections missing from `spec` keep the built-in values.
+    merged = {**default_plan_spec(), **spec}
+    version = merged["version"]
+    if not isinstance(version, str) or not version.strip():
+        raise ValueError("Scoring plan needs a non-empty 'version'.")
+
+    tables = {name: _weight_table(merged[name], name) for name in PLAN_TABLES}
+    caps = {**SCORE_CAPS, **_weight_table(merged["caps"], "caps")}
+    unknown = set(caps) - set(SCORE_CAPS)
+    if unknown:
+        raise ValueError(f"Unknown scoring plan caps: {', '.join(sorted(unknown))}.")
+    tiers = _weight_table(merged["tier_thresholds"], "tier_thresholds")
+    thresholds = {**TIER_THRESHOLDS, **{tier.upper(): value for tier, value in tiers.items()}}
+    if set(thresholds) != set(TIER_THRESHOLDS) or thresholds["A"] < thresholds["B"]:
+        raise ValueError("Scoring plan 'tier_thresholds' needs A and B with A >= B.")
+
+    canonical = {"version": version.strip(), **tables, "caps": caps, "tier_thresholds": thresholds}
+    spec_json = json.dumps(canonical, ensure_ascii=False)
+    matcher = KeywordMatcher([*tables["fit_keywords"], *tables["intent_keywords"], *tables["negative_keywords"], *tables["product_terms"], *ANGLE_TERMS])
+    return ScoringPlan(
+        version=canonical["version"],
+        digest=hashlib.sha256(spec_json.encode("utf-8")).hexdigest()[:16],
+        spec_json=spec_json,
+        **{name: MappingProxyType(table) for name, table in tables.items()},
+        caps=MappingProxyType(caps),
+        tier_a=thresholds["A"],
+        tier_b=thresholds["B"],
+        matcher=matcher,
+        word_terms=frozenset(t for t in matcher.terms if all(is_word_char(ch) for ch in t)),
+    )
+
+
+@lru_cache(maxsize=8)
+def plan_from_json(spec_json: str) -> ScoringPlan:
+    return compile_plan(json.loads(spec_json))
+
+
+DEFAULT_PLAN = compile_plan(default_plan_spec())
+KEYWORD_MATCHER = DEFAULT_PLAN.matcher
+WORD_TERMS = DEFAULT_PLAN.word_terms
+
+NON_WORD = re.compile(r"[^\w ]")
+
 
 @dataclass
 class ScoreBreakdown:
@@ -96,6 +223,23 @@ def keyword_points(text: str, mapping: dict[str, int], cap: int) -> int:
     return min(cap, points)
 
 
+def hit_keyword(hits: KeywordHits, text: str, keyword: str, word_terms: frozenset = WORD_TERMS) -> bool:
+    # Mirrors contains_keyword() using a precomputed scan of `text`.
+    if " " in keyword:
+        return keyword in hits.found
+    if keyword in word_terms:
+        return keyword in hits.words
+    return contains_keyword(text, keyword)
+
+
+def hit_points(hits: KeywordHits, text: str, mapping: Mapping[str, int], cap: int, word_terms: frozenset = WORD_TERMS) -> int:
+    points = 0
+    for key, weight in mapping.items():
+        if hit_keyword(hits, text, key, word_terms):
+            points += weight
+    return min(cap, points)
+
+
 def to_int(value: str, default: int = 0) -> int:
     try:
         return int(value)
@@ -103,22 +247,28 @@ def to_int(value: str, default: int = 0) -> int:
         return default
 
 
-def choose_tier(score: int) -> str:
-    if score >= 75:
+def choose_tier(score: int, plan: Optional[ScoringPlan] = None) -> str:
+    plan = plan or DEFAULT_PLAN
+    if score >= plan.tier_a:
         return "A"
-    if score >= 55:
+    if score >= plan.tier_b:
         return "B"
     return "C"
 
 
-def pick_offer_angle(text: str, language: str = "EN") -> str:
+def pick_offer_angle(text: str, language: str = "EN", plan: Optional[ScoringPlan] = None) -> str:
+    return offer_angle((plan or DEFAULT_PLAN).matcher.scan(text).found, language)
+
+
+def offer_angle(found: Container[str], language: str = "EN") -> str:
+    # `found` holds the ANGLE_TERMS present in the lead text (substring match).
     cn = language.upper() == "CN"
 
-    if "hospitality" in text or "hotel" in text:
+    if "hospitality" in found or "hotel" in found:
         return "酒店与商业空间 FF&E 配套，支持多项目复用" if cn else "a hospitality FF&E package with repeat property rollout"
-    if "staging" in text or "model home" in text:
+    if "staging" in found or "model home" in found:
         return "高周转样板间/软装组合，支持稳定补货" if cn else "fast-turn staging bundles with predictable replenishment"
-    if "lighting" in text:
+    if "lighting" in found:
         return "灯具与家具一体化组合方案，保证风格一致" if cn else "lighting-plus-furniture bundles for cohesive project design"
     return "可落地的批发价格与家具/灯具组合采购方案" if cn else "trade pricing and curated furniture/lighting bundles"
 
@@ -148,27 +298,32 @@ def template_outreach(company: str, city: str, angle: str, brand_name: str, lang
     return subject, body
 
 
-def score_row(row: dict[str, str], target_states: Iterable[str], language: str = "EN") -> tuple[ScoreBreakdown, list[str], str]:
+def score_row(
+    row: dict[str, str],
+    target_states: Iterable[str],
+    language: str = "EN",
+    plan: Optional[ScoringPlan] = None,
+) -> tuple[ScoreBreakdown, list[str], str]:
+    plan = plan or DEFAULT_PLAN
+    caps = plan.caps
     description = row.get("description", "")
     services = row.get("services", "")
     text = normalize_text(description, services)
-    service_list = parse_services(services)
+    service_set = set(parse_services(services))
+    hits = plan.matcher.scan(text)
 
-    industry_fit = keyword_points(text, FIT_KEYWORDS, cap=40)
+    industry_fit = hit_points(hits, text, plan.fit_keywords, caps["industry_fit"], plan.word_terms)
 
     product_match = 0
-    if "lighting" in text:
-        product_match += 10
-    if "furniture" in text:
-        product_match += 10
-    if "decor" in text:
-        product_match += 4
-    product_match = min(20, product_match)
+    for term, points in plan.product_terms.items():
+        if term in hits.found:
+            product_match += points
+    product_match = min(caps["product_match"], product_match)
 
     has_website = 1 if row.get("website", "").startswith("http") else 0
     has_trade = 1 if row.get("has_trade_program", "").strip().lower() == "yes" else 0
     has_procurement = 1 if row.get("has_procurement_page", "").strip().lower() == "yes" else 0
-    digital_signal = min(15, has_website * 5 + has_trade * 5 + has_procurement * 5)
+    digital_signal = min(caps["digital_signal"], has_website * 5 + has_trade * 5 + has_procurement * 5)
 
     employees = to_int(row.get("employee_estimate", "0"))
     projects = to_int(row.get("project_count", "0"))
@@ -183,46 +338,238 @@ def score_row(row: dict[str, str], target_states: Iterable[str], language: str =
         scale_signal += 7
     elif projects >= 60:
         scale_signal += 4
-    scale_signal = min(15, scale_signal)
+    scale_signal = min(caps["scale_signal"], scale_signal)
 
     if target_states and row.get("state", "").upper() in target_states:
-        scale_signal = min(15, scale_signal + 2)
+        scale_signal = min(caps["scale_signal"], scale_signal + 2)
+
+    intent_signal = hit_points(hits, text, plan.intent_keywords, caps["intent_signal"], plan.word_terms)
+    penalties = hit_points(hits, text, plan.negative_keywords, caps["penalties"], plan.word_terms)
+
+    for service, bonus in plan.service_bonus.items():
+        if service in service_set:
+            industry_fit = min(caps["industry_fit"], industry_fit + bonus)
+
+    breakdown = ScoreBreakdown(
+        industry_fit=industry_fit,
+        product_match=product_match,
+        digital_signal=digital_signal,
+        scale_signal=scale_signal,
+        intent_signal=intent_signal,
+        penalties=penalties,
+    )
+    return breakdown, build_reasons(breakdown, language), text
+
+
+def score_lead(
+    row: dict[str, str],
+    normalized_states: set[str],
+    normalized_language: str,
+    brand_name: str,
+    plan: Optional[ScoringPlan] = None,
+) -> LeadRecord:
+    breakdown, reasons, text = score_row(row, normalized_states, normalized_language, plan)
+    tier = choose_tier(breakdown.total, plan)
+    reason = join_reasons(reasons, normalized_language)
+
+    company = row.get("company_name", "Unknown")
+    city = row.get("city", "")
+    state = row.get("state", "")
+
+    angle = pick_offer_angle(text, normalized_language, plan)
+    subject, message = template_outreach(company, city, angle, brand_name, normalized_language)
+
+    return LeadRecord(
+        company_name=company,
+        city=city,
+        state=state,
+        website=row.get("website", ""),
+        source=row.get("source", ""),
+        services=row.get("services", ""),
+        description=row.get("description", ""),
+        score=breakdown.total,
+        tier=tier,
+        reason=reason,
+        outreach_subject=subject,
+        outreach_message=message,
+        industry_fit=breakdown.industry_fit,
+        product_match=breakdown.product_match,
+        digital_signal=breakdown.digital_signal,
+        scale_signal=breakdown.scale_signal,
+        intent_signal=breakdown.intent_signal,
+        penalties=breakdown.penalties,
+    )
+
 
-    intent_signal = keyword_points(text, INTENT_KEYWORDS, cap=10)
-    penalties = keyword_points(text, NEGATIVE_KEYWORDS, cap=0)
+def join_reasons(reasons: list[str], language: str = "EN") -> str:
+    if not reasons:
+        return "整体匹配度一般" if language == "CN" else "General fit"
+    return ("；" if language == "CN" else "; ").join(reasons)
 
-    for service, bonus in SERVICE_BONUS.items():
-        if service in service_list:
-            industry_fit = min(40, industry_fit + bonus)
 
+def build_reasons(breakdown: ScoreBreakdown, language: str = "EN") -> list[str]:
     cn = language.upper() == "CN"
 
     reasons: list[str] = []
-    if industry_fit >= 26:
+    if breakdown.industry_fit >= 26:
         reasons.append("行业匹配度高（设计/FF&E/软装）" if cn else "Strong vertical fit (design/FF&E/staging)")
-    if product_match >= 14:
+    if breakdown.product_match >= 14:
         reasons.append("与家具/灯具需求高度相关" if cn else "Clear furniture/lighting relevance")
-    if digital_signal >= 10:
+    if breakdown.digital_signal >= 10:
         reasons.append("数字化采购信号明确（trade/procurement 页面）" if cn else "Good digital buying signals (trade/procurement pages)")
-    if intent_signal >= 6:
+    if breakdown.intent_signal >= 6:
         reasons.append("采购意向信号强（在找供应商）" if cn else "Intent signals suggest active vendor sourcing")
-    if penalties < 0:
+    if breakdown.penalties < 0:
         reasons.append("存在低相关业务信号" if cn else "Contains low-relevance business signals")
+    return reasons
+
+
+@dataclass
+class BatchScores:
+    industry_fit: "np.ndarray"
+    product_match: "np.ndarray"
+    digital_signal: "np.ndarray"
+    scale_signal: "np.ndarray"
+    intent_signal: "np.ndarray"
+    penalties: "np.ndarray"
+    total: "np.ndarray"
+    tier: "np.ndarray"
+    text: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.total)
+
+    def breakdown(self, index: int) -> ScoreBreakdown:
+        return ScoreBreakdown(
+            industry_fit=int(self.industry_fit[index]),
+            product_match=int(self.product_match[index]),
+            digital_signal=int(self.digital_signal[index]),
+            scale_signal=int(self.scale_signal[index]),
+            intent_signal=int(self.intent_signal[index]),
+            penalties=int(self.penalties[index]),
+        )
+
+    def reasons(self, index: int, language: str = "EN") -> list[str]:
+        return build_reasons(self.breakdown(index), language)
+
+    def ranked(self, limit: int | None = None) -> "np.ndarray":
+        # Stable descending order, same as list.sort(key=score, reverse=True).
+        order = np.argsort(-self.total, kind="stable")
+        return order if limit is None else order[: max(0, limit)]
+
 
-    return (
-        ScoreBreakdown(
-            industry_fit=industry_fit,
-            product_match=product_match,
-            digital_signal=digital_signal,
-            scale_signal=scale_signal,
-            intent_signal=intent_signal,
-            penalties=penalties,
-        ),
-        reasons,
-        text,
+def _text_column(columns: dict, name: str, size: int) -> "np.ndarray":
+    values = columns.get(name)
+    if values is None:
+        return np.full(size, "", dtype="<U1")
+    array = np.asarray(values)
+    if array.dtype.kind != "U":
+        array = np.array(["" if value is None else str(value) for value in array.tolist()], dtype=str)
+    if len(array) != size:
+        raise ValueError(f"Column '{name}' has {len(array)} rows, expected {size}.")
+    return array
+
+
+def _int_column(values: "np.ndarray") -> "np.ndarray":
+    # to_int() per value; clamp so huge numbers still compare correctly in int64.
+    return np.fromiter((max(-(2**62), min(2**62, to_int(value))) for value in values.tolist()), dtype=np.int64, count=len(values))
+
+
+def _flag_column(values: "np.ndarray") -> "np.ndarray":
+    return np.char.lower(np.char.strip(values)) == "yes"
+
+
+def _contains(array: "np.ndarray", term: str) -> "np.ndarray":
+    if not len(array):
+        return np.zeros(0, dtype=bool)
+    return np.char.find(array, term) >= 0
+
+
+def _table_points(hits: dict[str, "np.ndarray"], mapping: Mapping[str, int], cap: int, size: int) -> "np.ndarray":
+    points = np.zeros(size, dtype=np.int32)
+    for key, weight in mapping.items():
+        points += hits[key] * weight
+    return np.minimum(points, cap)
+
+
+def score_batch(columns: dict, target_states: Iterable[str], language: str = "EN", plan: Optional[ScoringPlan] = None) -> BatchScores:
+    if np is None:
+        raise RuntimeError("score_batch requires numpy.")
+    plan = plan or DEFAULT_PLAN
+    caps = plan.caps
+
+    present = [values for values in columns.values() if values is not None]
+    size = len(present[0]) if present else 0
+
+    descriptions = _text_column(columns, "description", size)
+    services = _text_column(columns, "services", size)
+    text = np.array([normalize_text(d, s) for d, s in zip(descriptions.tolist(), services.tolist())], dtype=str)
+    # `\bterm\b` on text becomes " term " on a space-padded copy with non-word chars blanked out.
+    word_text = np.array([f" {NON_WORD.sub(' ', t)} " for t in text.tolist()], dtype=str)
+    service_text = np.array([f";{';'.join(parse_services(s))};" for s in services.tolist()], dtype=str)
+
+    hits: dict[str, "np.ndarray"] = {}
+    for table in (plan.fit_keywords, plan.intent_keywords, plan.negative_keywords):
+        for key in table:
+            if key in hits:
+                continue
+            if " " in key:
+                hits[key] = _contains(text, key)
+            elif all(is_word_char(ch) for ch in key):
+                hits[key] = _contains(word_text, f" {key} ")
+            else:
+                hits[key] = np.array([contains_keyword(t, key) for t in text.tolist()], dtype=bool)
+
+    industry_fit = _table_points(hits, plan.fit_keywords, caps["industry_fit"], size)
+    service_bonus = np.zeros(size, dtype=np.int32)
+    for service, bonus in plan.service_bonus.items():
+        service_bonus += _contains(service_text, f";{service};") * bonus
+    industry_fit = np.minimum(caps["industry_fit"], industry_fit + service_bonus)
+
+    product_match = np.zeros(size, dtype=np.int32)
+    for term, points in plan.product_terms.items():
+        product_match += _contains(text, term) * points
+    product_match = np.minimum(caps["product_match"], product_match)
+
+    websites = _text_column(columns, "website", size)
+    has_website = np.char.startswith(websites, "http") if size else np.zeros(0, dtype=bool)
+    has_trade = _flag_column(_text_column(columns, "has_trade_program", size))
+    has_procurement = _flag_column(_text_column(columns, "has_procurement_page", size))
+    digital_signal = np.minimum(caps["digital_signal"], (has_website.astype(np.int32) + has_trade + has_procurement) * 5)
+
+    employees = _int_column(_text_column(columns, "employee_estimate", size))
+    projects = _int_column(_text_column(columns, "project_count", size))
+    scale_signal = np.select([(employees >= 10) & (employees <= 80), employees > 80], [8, 5], 0)
+    scale_signal = scale_signal + np.select([projects >= 100, projects >= 60], [7, 4], 0)
+    scale_signal = np.minimum(caps["scale_signal"], scale_signal).astype(np.int32)
+
+    states = set(target_states or ())
+    if states:
+        in_target = np.isin(np.char.upper(_text_column(columns, "state", size)), list(states))
+        scale_signal = np.minimum(caps["scale_signal"], scale_signal + in_target * 2)
+
+    intent_signal = _table_points(hits, plan.intent_keywords, caps["intent_signal"], size)
+    penalties = _table_points(hits, plan.negative_keywords, caps["penalties"], size)
+
+    total = np.clip(industry_fit + product_match + digital_signal + scale_signal + intent_signal + penalties, 0, 100)
+    tier = np.select([total >= plan.tier_a, total >= plan.tier_b], ["A", "B"], "C")
+
+    return BatchScores(
+        industry_fit=industry_fit,
+        product_match=product_match,
+        digital_signal=digital_signal,
+        scale_signal=scale_signal,
+        intent_signal=intent_signal,
+        penalties=penalties,
+        total=total,
+        tier=tier,
+        text=text,
     )
 
 
 def summarize_state_tiers(states: list[str]) -> list[dict[str, int]]:
-    counter = Counter(states)
+    return summarize_state_counts(Counter(states))
+
+
+def summarize_state_counts(counter: Counter) -> list[dict[str, int]]:
     return [{state: count} for state, count in counter.most_common(5)]
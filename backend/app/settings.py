@@ -8,6 +8,64 @@ class Settings(BaseSettings):
 
     openai_api_key: str = ""
     openai_model: str = "gpt-4.1-mini"
+    # Empty means the SDK default; point at scripts/fake_openai_server.py for offline runs.
+    openai_base_url: str = ""
+    ai_max_concurrency: int = 8
+    ai_request_timeout: float = 30.0
+    ai_connect_timeout: float = 5.0
+    # Calls without their own deadline (refinements); for streams, the longest gap between events.
+    ai_read_timeout: float = 60.0
+    ai_max_retries: int = 2
+    # Hedged requests: duplicate a call that outlives the model's recent p95 latency.
+    ai_hedge_enabled: bool = False
+    ai_hedge_quantile: float = 0.95
+    ai_hedge_min_samples: int = 20
+    ai_hedge_min_delay: float = 0.5
+    # Batched outreach (ai_batch=true): prompt + expected output tokens per request.
+    ai_batch_token_budget: int = 6000
+    ai_batch_max_leads: int = 12
+    ai_batch_retries: int = 1
+
+    data_dir: str = ".data"
+    ai_cache_enabled: bool = True
+    ai_cache_ttl_seconds: int = 7 * 24 * 3600
+    ai_cache_memory_entries: int = 1024
+    ai_cache_disk_entries: int = 50_000
+
+    csv_chunk_size: int = 64 * 1024
+    result_store_max_results: int = 16
+    result_store_ttl_seconds: int = 3600
+    job_workers: int = 2
+    # Finished jobs, result JSON included, are deleted this long after they end; 0 keeps them.
+    job_retention_hours: int = 24
+    # Serialized /api/process responses; AI drafts expire sooner than deterministic scores.
+    process_cache_entries: int = 32
+    process_cache_max_mb: int = 256
+    process_cache_ttl_seconds: int = 3600
+    process_cache_ai_ttl_seconds: int = 600
+    # gzip/brotli by Accept-Encoding; bodies smaller than this go out as-is.
+    response_compression: bool = True
+    response_compression_min_bytes: int = 1024
+    # Every run's ranked leads are archived for /api/leads/search; older runs are pruned.
+    lead_store_enabled: bool = True
+    lead_store_retention_days: int = 90
+    dataset_memory_entries: int = 4
+    dataset_disk_entries: int = 100
+
+    # Weight tables, caps and tier thresholds; re-read when the file changes.
+    scoring_plan_path: str = "../sample-data/scoring_plan.json"
+    scoring_plan_check_seconds: float = 1.0
+
+    # Uploads with at least this many rows are scored on a process pool (0 disables it).
+    parallel_scoring_min_rows: int = 50_000
+    parallel_chunk_rows: int = 5_000
+    scoring_workers: int = 0
+
+    # Near-duplicate detection (dedupe=true): rows whose weighted name/website/description
+    # similarity reaches this are merged. MinHash uses bands * band_rows hashes per field.
+    dedupe_threshold: float = 0.6
+    dedupe_bands: int = 16
+    dedupe_band_rows: int = 4
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from synthetic_leads import write_csv  # noqa: E402
+
+from app.reporting import top_leads_markdown  # noqa: E402
+from app.scoring import FIT_KEYWORDS, KEYWORD_MATCHER, keyword_points, normalize_text, score_lead, score_row  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+TARGET_STATES = {"AZ", "CA", "TX", "FL", "NY"}
+CHUNK_ROWS = 50_000
+
+
+def iter_chunks(csv_path: Path) -> Iterator[list[dict[str, str]]]:
+    # Per-row benchmarks stream the file in chunks so 1M-row runs stay in bounded memory.
+    with csv_path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        while chunk := list(islice(reader, CHUNK_ROWS)):
+            yield chunk
+
+
+def timed_over_chunks(csv_path: Path, prepare: Callable[[list[dict]], Any], run: Callable[[Any], None]) -> float:
+    # Only `run` is timed; reading and `prepare` happen outside the clock.
+    elapsed = 0.0
+    for chunk in iter_chunks(csv_path):
+        prepared = prepare(chunk)
+        start = time.perf_counter()
+        run(prepared)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def bench_score_row(csv_path: Path) -> float:
+    def run(rows: list[dict]) -> None:
+        for row in rows:
+            score_row(row, TARGET_STATES, "EN")
+
+    return timed_over_chunks(csv_path, lambda rows: rows, run)
+
+
+def bench_keyword_points(csv_path: Path) -> float:
+    def run(texts: list[str]) -> None:
+        for text in texts:
+            keyword_points(text, FIT_KEYWORDS, cap=40)
+
+    return timed_over_chunks(csv_path, lambda rows: [normalize_text(r["description"], r["services"]) for r in rows], run)
+
+
+def bench_keyword_scan(csv_path: Path) -> float:
+    def run(texts: list[str]) -> None:
+        for text in texts:
+            KEYWORD_MATCHER.scan(text)
+
+    return timed_over_chunks(csv_path, lambda rows: [normalize_text(r["description"], r["services"]) for r in rows], run)
+
+
+def bench_top_leads_markdown(csv_path: Path) -> float:
+    leads = []
+    for chunk in iter_chunks(csv_path):
+        leads.extend(score_lead(row, TARGET_STATES, "EN", "Sunny Home") for row in chunk)
+    leads.sort(key=lambda lead: lead.score, reverse=True)
+    start = time.perf_counter()
+    top_leads_markdown(leads, top_n=len(leads), language="EN")
+    return time.perf_counter() - start
+
+
+def make_process_bench(page_size: int) -> Callable[[Path], float]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app, lead_store
+
+    def bench(csv_path: Path) -> float:
+        with TestClient(app) as client, csv_path.open("rb") as f:
+            start = time.perf_counter()
+            # ai_cache=false bypasses the response cache, which would otherwise answer every run after the first.
+            response = client.post(
+                "/api/process",
+                files={"file": (csv_path.name, f, "text/csv")},
+                data={"page_size": str(page_size), "ai_cache": "false"},
+            )
+            elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        # Runs are archived in the background; finish that outside the timing, not during the next repeat.
+        if lead_store is not None:
+            lead_store.flush()
+        return elapsed
+
+    return bench
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent)
+        return out.stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_benchmark(name: str, fn: Callable[[Path], float], csv_path: Path, rows: int, repeat: int) -> dict[str, Any]:
+    seconds = [fn(csv_path) for _ in range(repeat)]
+    best = min(seconds)
+    return {
+        "name": name,
+        "rows": rows,
+        "repeat": repeat,
+        "seconds": [round(s, 6) for s in seconds],
+        "min_s": round(best, 6),
+        "median_s": round(statistics.median(seconds), 6),
+        "per_row_us": round(best / rows * 1e6, 3) if rows else 0.0,
+        "rows_per_s": round(rows / best, 1) if best else 0.0,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+
+def compare(current: dict[str, Any], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(r["name"], r["rows"]): r for r in baseline.get("results", []) if "min_s" in r}
+    print(f"\nvs {baseline_path} ({baseline.get('meta', {}).get('commit', '?')})")
+    for result in current["results"]:
+        before = previous.get((result["name"], result["rows"]))
+        if before is None or "min_s" not in result:
+            continue
+        ratio = result["min_s"] / before["min_s"] if before["min_s"] else float("inf")
+        print(f"- {result['name']:<20} {result['rows']:>9} rows  {before['min_s']:.3f}s -> {result['min_s']:.3f}s  ({ratio:.2f}x time)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Sunny Demo scoring, reporting and /api/process hot paths")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated row counts")
+    parser.add_argument("--benchmarks", default="score_row,keyword_points,keyword_scan,top_leads_markdown,process", help="Comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--page-size", type=int, default=100, help="page_size sent to /api/process (0 returns every lead in the response)")
+    parser.add_argument("--max-report-rows", type=int, default=100_000, help="Skip top_leads_markdown above this many rows")
+    parser.add_argument("--data-dir", default="", help="Where generated CSVs are kept (default: a temp dir)")
+    parser.add_argument("--output", default="", help="JSON output path (default: bench_results/bench-<commit>.json)")
+    parser.add_argument("--compare", default="", help="Earlier JSON output to compare against")
+    args = parser.parse_args()
+
+    base_dir = Path(__file__).resolve().parents[1]
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    names = [n.strip() for n in args.benchmarks.split(",") if n.strip()]
+    commit = git_commit()
+
+    benchmarks: dict[str, Callable[[Path], float]] = {
+        "score_row": bench_score_row,
+        "keyword_points": bench_keyword_points,
+        "keyword_scan": bench_keyword_scan,
+        "top_leads_markdown": bench_top_leads_markdown,
+    }
+    if "process" in names:
+        benchmarks["process"] = make_process_bench(args.page_size)
+    unknown = set(names) - set(benchmarks)
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    data_dir = Path(args.data_dir) if args.data_dir else Path(tempfile.mkdtemp(prefix="sunny-bench-"))
+    results: list[dict[str, Any]] = []
+    for rows in sizes:
+        csv_path = data_dir / f"synthetic_{rows}_{args.seed}.csv"
+        if not csv_path.exists():
+            write_csv(csv_path, rows, args.seed)
+        for name in names:
+            if name == "top_leads_markdown" and rows > args.max_report_rows:
+                results.append({"name": name, "rows": rows, "skipped": f"rows > --max-report-rows ({args.max_report_rows})"})
+                continue
+            result = run_benchmark(name, benchmarks[name], csv_path, rows, args.repeat)
+            results.append(result)
+            print(f"{name:<20} {rows:>9} rows  min {result['min_s']:.3f}s  {result['per_row_us']:.2f} us/row  rss {result['max_rss_mb']} MB")
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "page_size": args.page_size,
+            "parallel_scoring_min_rows": settings.parallel_scoring_min_rows,
+            "scoring_workers": settings.scoring_workers,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else base_dir / "bench_results" / f"bench-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults: {output}")
+
+    if args.compare:
+        compare(report, Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import csv
+import random
+from pathlib import Path
+from typing import Iterator
+
+# Same columns as sample-data/lead_template.csv.
+FIELDNAMES = [
+    "company_name",
+    "city",
+    "state",
+    "website",
+    "description",
+    "services",
+    "employee_estimate",
+    "project_count",
+    "has_trade_program",
+    "has_procurement_page",
+    "source",
+]
+
+CITIES = [
+    ("Phoenix", "AZ"),
+    ("Scottsdale", "AZ"),
+    ("Los Angeles", "CA"),
+    ("San Diego", "CA"),
+    ("San Francisco", "CA"),
+    ("Austin", "TX"),
+    ("Dallas", "TX"),
+    ("Houston", "TX"),
+    ("Miami", "FL"),
+    ("Orlando", "FL"),
+    ("New York", "NY"),
+    ("Brooklyn", "NY"),
+    ("Chicago", "IL"),
+    ("Denver", "CO"),
+    ("Seattle", "WA"),
+    ("Atlanta", "GA"),
+    ("Nashville", "TN"),
+    ("Boston", "MA"),
+]
+
+NAME_PARTS = ["Luma", "Desert", "Oak", "Cedar", "Willow", "Atlas", "Mosaic", "Praxis", "Northline", "Harbor", "Summit", "Ember", "Linen", "Copper", "Sage"]
+NAME_SUFFIXES = ["Interior Studio", "Staging Co", "Design Collective", "Hospitality Group", "Architecture", "Interiors", "Home Staging", "Workplace Studio", "Property Services", "Motors", "Dental Care", "Landscaping", "Events"]
+
+# (weight, description sentences, services) per vertical; most lists are design-adjacent.
+VERTICALS = [
+    (
+        30,
+        [
+            "Boutique interior design studio serving luxury residential clients.",
+            "Full-service interior design firm that frequently specifies custom lighting and living room furniture.",
+            "Residential interior architecture practice focused on premium remodels.",
+        ],
+        ["interior design", "lighting design", "furniture procurement", "interior architecture", "space planning"],
+    ),
+    (
+        20,
+        [
+            "Home staging company for premium listings and model home programs.",
+            "Fast-turn staging partner that needs furniture and decor bundles with recurring replenishment.",
+            "Staging and model home merchandising for regional builders.",
+        ],
+        ["home staging", "staging", "furniture rental", "decor"],
+    ),
+    (
+        15,
+        [
+            "Hospitality design group delivering FFE packages for boutique hotels.",
+            "Hotel renovation consultancy with centralized furnishing and preferred vendor programs.",
+            "FF&E procurement advisor for hospitality and multifamily projects.",
+        ],
+        ["hospitality design", "ffe consulting", "furniture procurement", "procurement"],
+    ),
+    (
+        15,
+        [
+            "Architecture firm designing commercial and workplace interiors.",
+            "Design-build team that runs vendor qualification for sourcing lighting fixtures.",
+            "Workplace design studio bundling furniture and lighting for office fit-outs.",
+        ],
+        ["architecture", "workplace design", "lighting", "project management"],
+    ),
+    (
+        20,
+        [
+            "Automotive dealership with service and maintenance center.",
+            "Dental practice offering family and cosmetic care.",
+            "Commercial landscaping and grounds maintenance contractor.",
+            "Corporate events and party rental company.",
+        ],
+        ["auto repair", "maintenance", "landscaping", "events", "dental services"],
+    ),
+]
+
+EXTRA_SENTENCES = [
+    "Works on 20-40 projects per year across the metro area.",
+    "Looking for a sourcing partner with reliable lead times.",
+    "Team handles procurement in-house through a trade program.",
+    "Recently expanded into multifamily amenity spaces.",
+    "Clients expect cohesive decor and statement lighting.",
+    "Prefers vendors that can bundle furniture by room.",
+    "",
+]
+
+SOURCES = ["manual_research", "directory", "scraped", "referral"]
+
+
+def generate_leads(count: int, seed: int = 7) -> Iterator[dict[str, str]]:
+    rng = random.Random(seed)
+    weights = [vertical[0] for vertical in VERTICALS]
+    for index in range(count):
+        _, sentences, services = rng.choices(VERTICALS, weights=weights)[0]
+        city, state = rng.choice(CITIES)
+        name = f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_SUFFIXES)} {index}"
+        description = " ".join(s for s in (rng.choice(sentences), rng.choice(EXTRA_SENTENCES), rng.choice(EXTRA_SENTENCES)) if s)
+        yield {
+            "company_name": name,
+            "city": city,
+            "state": state,
+            "website": f"https://{name.lower().replace(' ', '')}.example" if rng.random() < 0.85 else "",
+            "description": description,
+            "services": ";".join(rng.sample(services, k=rng.randint(1, min(3, len(services))))),
+            "employee_estimate": str(rng.choice([3, 8, 12, 18, 24, 40, 65, 80, 120, 300])),
+            "project_count": str(rng.choice([15, 40, 60, 85, 100, 140, 210])),
+            "has_trade_program": rng.choice(["yes", "no"]),
+            "has_procurement_page": rng.choice(["yes", "no", "no"]),
+            "source": rng.choice(SOURCES),
+        }
+
+
+def write_csv(path: Path, count: int, seed: int = 7) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(generate_leads(count, seed))
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic lead CSV in the lead_template.csv schema")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default="synthetic_leads.csv")
+    args = parser.parse_args()
+
+    path = write_csv(Path(args.output), args.rows, args.seed)
+    print(f"Wrote {args.rows} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
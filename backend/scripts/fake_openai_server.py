@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI Responses API (POST /v1/responses), for offline load tests.
+
+    python scripts/fake_openai_server.py --port 8787 --latency-ms 400 --latency-dist lognormal --rate-limit-rate 0.05
+
+Then run the backend with OPENAI_BASE_URL=http://127.0.0.1:8787/v1 and any OPENAI_API_KEY.
+In tests, `running_server()` backs the `fake_openai` fixture in tests/conftest.py.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_DISTS = ("fixed", "uniform", "exponential", "lognormal")
+OUTPUT_MODES = ("json", "fenced", "malformed")
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 300.0
+    # fixed: always latency_ms; uniform: [0, 2 * latency_ms]; exponential: mean latency_ms;
+    # lognormal: median latency_ms with shape latency_sigma (a realistic long tail).
+    latency_dist: str = "lognormal"
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    reject_temperature: bool = False
+    # With stream=true, latency is the time to the first delta; then one delta per chunk_ms.
+    stream_chunk_chars: int = 16
+    stream_chunk_ms: float = 20.0
+    # Output modes are picked per prompt (by hash), so the same prompt always gets the same output.
+    output_modes: tuple[str, ...] = ("json",)
+    seed: int = 0
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _field(block: str, name: str) -> str:
+    match = re.search(rf"^- {re.escape(name)}: (.*)$", block, re.MULTILINE)
+    return match.group(1).strip() if match else ""
+
+
+def _draft(prompt: str, block: str) -> dict[str, str]:
+    company = _field(block, "company") or "there"
+    place = _field(block, "city/state")
+    variant = _digest(prompt + block) % 3
+    openers = ("Quick idea for", "Sourcing support for", "Furniture and lighting for")
+    return {
+        "subject": f"{openers[variant]} {company}"[:70],
+        "body": (
+            f"Hi {company} team,\n\nWe supply mid-to-high-end furniture and lighting for projects"
+            f"{' in ' + place if place.strip(', ') else ''}, with samples in a week and stable lead times.\n\n"
+            "Would a short call next week be useful?"
+        ),
+    }
+
+
+def render_output(prompt: str, mode: str) -> str:
+    # Batched prompts ("Prospects:" with [n] blocks) get a JSON array; everything else one object.
+    if "\nProspects:\n" in prompt:
+        blocks = re.split(r"^\[(\d+)\]\n", prompt.split("\nProspects:\n", 1)[1], flags=re.MULTILINE)[1:]
+        payload: Any = [
+            {"id": int(number), "company": _field(block, "company"), **_draft(prompt, block)}
+            for number, block in zip(blocks[::2], blocks[1::2])
+        ]
+    else:
+        section = prompt.split("\nProspect:\n", 1)[-1]
+        payload = _draft(prompt, section)
+    text = json.dumps(payload, ensure_ascii=False)
+    if mode == "fenced":
+        return f"```json\n{text}\n```"
+    if mode == "malformed":
+        return text[: max(1, len(text) * 2 // 3)]
+    return text
+
+
+class FakeResponsesServer:
+    def __init__(self, config: Optional[FakeConfig] = None) -> None:
+        self.config = config or FakeConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats: dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def _draw(self) -> tuple[float, float]:
+        # One lock-protected draw per request: (latency seconds, fault roll).
+        config = self.config
+        with self._lock:
+            roll = self._random.random()
+            base = config.latency_ms / 1000
+            if config.latency_dist == "uniform":
+                latency = self._random.uniform(0, 2 * base)
+            elif config.latency_dist == "exponential":
+                latency = self._random.expovariate(1 / base) if base > 0 else 0.0
+            elif config.latency_dist == "lognormal":
+                latency = self._random.lognormvariate(math.log(base), config.latency_sigma) if base > 0 else 0.0
+            else:
+                latency = base
+        return latency, roll
+
+    @staticmethod
+    def _error(status: int, message: str, kind: str, **headers: str) -> JSONResponse:
+        body = {"error": {"message": message, "type": kind, "param": None, "code": None}}
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    @staticmethod
+    def _response_body(payload: dict[str, Any], prompt: str, text: str, status: str = "completed") -> dict[str, Any]:
+        prompt_tokens = len(prompt.encode("utf-8")) // 4 + 1
+        output_tokens = len(text.encode("utf-8")) // 4 + 1
+        return {
+            "id": f"resp_{_digest(prompt + str(time.time_ns())):016x}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": status,
+            "model": payload.get("model", ""),
+            "output": [
+                {
+                    "type": "message",
+                    "id": f"msg_{_digest(prompt):016x}",
+                    "status": status,
+                    "role": "assistant",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}] if text else [],
+                }
+            ],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": prompt_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens,
+            },
+        }
+
+    async def _stream(self, payload: dict[str, Any], prompt: str, text: str) -> AsyncIterator[bytes]:
+        config = self.config
+        item_id = f"msg_{_digest(prompt):016x}"
+        events: list[dict[str, Any]] = [{"type": "response.created", "response": self._response_body(payload, prompt, "", "in_progress")}]
+        step = max(1, config.stream_chunk_chars)
+        for offset in range(0, len(text), step):
+            events.append(
+                {
+                    "type": "response.output_text.delta",
+                    "item_id": item_id,
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": text[offset : offset + step],
+                    "logprobs": [],
+                }
+            )
+        events.append({"type": "response.output_text.done", "item_id": item_id, "output_index": 0, "content_index": 0, "text": text, "logprobs": []})
+        events.append({"type": "response.completed", "response": self._response_body(payload, prompt, text)})
+        for number, event in enumerate(events):
+            if number > 1 and event["type"] == "response.output_text.delta":
+                await asyncio.sleep(config.stream_chunk_ms / 1000)
+            event["sequence_number"] = number
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+
+    async def create_response(self, request: Request) -> Response:
+        config = self.config
+        payload = await request.json()
+        self._count("requests")
+        latency, roll = self._draw()
+        await asyncio.sleep(latency)
+
+        if config.reject_temperature and "temperature" in payload:
+            self._count("temperature_rejected")
+            return self._error(
+                400, "Unsupported parameter: 'temperature' is not supported with this model.", "invalid_request_error"
+            )
+        if roll < config.rate_limit_rate:
+            self._count("rate_limited")
+            return self._error(
+                429, "Rate limit reached (fake server).", "rate_limit_error", **{"retry-after": str(config.retry_after_seconds)}
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._count("errors")
+            return self._error(500, "Injected server error (fake server).", "server_error")
+
+        prompt = payload.get("input") or ""
+        if not isinstance(prompt, str):
+            prompt = json.dumps(prompt, ensure_ascii=False)
+        modes = config.output_modes or ("json",)
+        mode = modes[_digest(prompt) % len(modes)]
+        text = render_output(prompt, mode)
+        self._count(f"output_{mode}")
+        if payload.get("stream"):
+            self._count("streamed")
+            return StreamingResponse(self._stream(payload, prompt, text), media_type="text/event-stream")
+        return JSONResponse(self._response_body(payload, prompt, text))
+
+    def app(self) -> FastAPI:
+        app = FastAPI(title="Fake OpenAI Responses API")
+        app.add_api_route("/v1/responses", self.create_response, methods=["POST"])
+
+        @app.get("/stats")
+        def stats() -> dict[str, Any]:
+            with self._lock:
+                return {"config": asdict(self.config), "counts": dict(self.stats)}
+
+        return app
+
+
+@contextmanager
+def running_server(config: Optional[FakeConfig] = None, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """Serves the fake API in a background thread and yields its base URL (ending in /v1)."""
+    server = FakeResponsesServer(config)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    uv = uvicorn.Server(uvicorn.Config(server.app(), log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=uv.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    try:
+        while not uv.started:
+            if not thread.is_alive():
+                raise RuntimeError("Fake OpenAI server failed to start.")
+            time.sleep(0.01)
+        yield f"http://{host}:{sock.getsockname()[1]}/v1"
+    finally:
+        uv.should_exit = True
+        thread.join(timeout=5)
+        sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTS, default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Shape of the lognormal distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--reject-temperature", action="store_true", help="Answer 400 when a request sets temperature")
+    parser.add_argument("--stream-chunk-ms", type=float, default=20.0, help="Delay between streamed deltas")
+    parser.add_argument("--outputs", default="json", help=f"Comma-separated output modes to mix: {', '.join(OUTPUT_MODES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    modes = tuple(m.strip() for m in args.outputs.split(",") if m.strip())
+    unknown = [m for m in modes if m not in OUTPUT_MODES]
+    if unknown:
+        raise SystemExit(f"Unknown output mode(s): {', '.join(unknown)}")
+
+    config = FakeConfig(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after,
+        reject_temperature=args.reject_temperature,
+        stream_chunk_ms=args.stream_chunk_ms,
+        output_modes=modes or ("json",),
+        seed=args.seed,
+    )
+    print(f"Fake OpenAI Responses API on http://{args.host}:{args.port}/v1 (stats at /stats)")
+    uvicorn.run(FakeResponsesServer(config).app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
 import json
+import math
 import os
 import statistics
 import time
@@ -12,7 +14,7 @@ from pathlib import Path
 from typing import Any
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
@@ -106,8 +108,55 @@ def read_top_leads(csv_path: Path, language: str, target_states: set[str], top_n
     return leads[:top_n]
 
 
-def run_model_test(
-    client: OpenAI,
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    # Linear interpolation between closest ranks (numpy's default / "inclusive" method).
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def binomial_cdf(n: int, p: float) -> list[float]:
+    # cdf[k] = P(X <= k) for X ~ Binomial(n, p), via log-pmf so large n does not underflow.
+    cdf: list[float] = []
+    total = 0.0
+    for k in range(n + 1):
+        log_pmf = math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1) + k * math.log(p) + (n - k) * math.log1p(-p)
+        total += math.exp(log_pmf)
+        cdf.append(min(total, 1.0))
+    return cdf
+
+
+def percentile_ci(sorted_values: list[float], pct: float, confidence: float = 0.95) -> tuple[float | None, float | None]:
+    # Distribution-free CI from order statistics: [x_(l), x_(u)] covers the true percentile
+    # with probability >= confidence. A bound is None when the sample is too small to give one
+    # (e.g. the upper bound of p99 needs a few hundred requests).
+    n = len(sorted_values)
+    if n == 0:
+        return None, None
+    alpha = (1 - confidence) / 2
+    cdf = binomial_cdf(n, pct / 100)
+    lower = upper = None
+    for k in range(1, n + 1):
+        if cdf[k - 1] <= alpha:
+            lower = sorted_values[k - 1]
+    for k in range(n, 0, -1):
+        if 1 - cdf[k - 1] <= alpha:
+            upper = sorted_values[k - 1]
+    return lower, upper
+
+
+def _ms(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
+
+
+async def run_model_test(
+    client: AsyncOpenAI,
     model: str,
     leads: list[Lead],
     *,
@@ -115,35 +164,55 @@ def run_model_test(
     brand_name: str,
     positioning: str,
     tone: str,
+    concurrency: int = 1,
+    trials: int = 1,
+    warmup: int = 0,
+    confidence: float = 0.95,
 ) -> tuple[list[dict[str, Any]], dict[str, Any]]:
-    rows: list[dict[str, Any]] = []
-    latencies: list[float] = []
-    subject_lens: list[int] = []
-    body_lens: list[int] = []
-    success_count = 0
-
-    for lead in leads:
-        prompt = build_prompt(
+    prompts = [
+        build_prompt(
             language=language,
             brand_name=brand_name,
             positioning=positioning,
             tone=tone,
             lead=lead,
         )
-        start = time.perf_counter()
-        error = ""
-        subject = ""
-        body = ""
-        try:
-            resp = client.responses.create(model=model, input=prompt, temperature=0.3)
-            text = (resp.output_text or "").strip()
-            subject, body = parse_json_response(text)
-            if subject and body:
-                success_count += 1
-        except Exception as exc:
-            error = str(exc)
-
-        latency_ms = (time.perf_counter() - start) * 1000
+        for lead in leads
+    ]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def request(prompt: str) -> tuple[float, str, str]:
+        # Latency is measured after the semaphore is acquired, so it excludes local queueing.
+        async with semaphore:
+            start = time.perf_counter()
+            text = ""
+            error = ""
+            try:
+                resp = await client.responses.create(model=model, input=prompt, temperature=0.3)
+                text = (resp.output_text or "").strip()
+            except Exception as exc:
+                error = str(exc)
+            return (time.perf_counter() - start) * 1000, text, error
+
+    # Warmup: connection setup, TLS and any cold start on the provider side; not recorded.
+    if warmup > 0:
+        await asyncio.gather(*(request(prompts[i % len(prompts)]) for i in range(warmup)))
+
+    jobs = [(trial, lead, prompt) for trial in range(1, trials + 1) for lead, prompt in zip(leads, prompts)]
+    wall_start = time.perf_counter()
+    results = await asyncio.gather(*(request(prompt) for _, _, prompt in jobs))
+    wall_seconds = time.perf_counter() - wall_start
+
+    rows: list[dict[str, Any]] = []
+    latencies: list[float] = []
+    subject_lens: list[int] = []
+    body_lens: list[int] = []
+    success_count = 0
+
+    for (trial, lead, _), (latency_ms, text, error) in zip(jobs, results):
+        subject, body = parse_json_response(text) if not error else ("", "")
+        if subject and body:
+            success_count += 1
         latencies.append(latency_ms)
         subject_lens.append(len(subject))
         body_lens.append(len(body))
@@ -151,6 +220,7 @@ def run_model_test(
         rows.append(
             {
                 "model": model,
+                "trial": trial,
                 "company_name": lead.company_name,
                 "lead_score": lead.score,
                 "lead_reason": lead.reason,
@@ -163,16 +233,26 @@ def run_model_test(
             }
         )
 
-    summary = {
+    ordered = sorted(latencies)
+    summary: dict[str, Any] = {
         "model": model,
-        "requests": len(leads),
+        "concurrency": concurrency,
+        "trials": trials,
+        "warmup": warmup,
+        "requests": len(jobs),
         "success": success_count,
-        "success_rate": round((success_count / len(leads)) * 100, 1) if leads else 0.0,
+        "success_rate": round((success_count / len(jobs)) * 100, 1) if jobs else 0.0,
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_rps": round(len(jobs) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
         "avg_latency_ms": round(statistics.mean(latencies), 1) if latencies else 0.0,
-        "p95_latency_ms": round(sorted(latencies)[max(0, int(len(latencies) * 0.95) - 1)], 1) if latencies else 0.0,
-        "avg_subject_len": round(statistics.mean(subject_lens), 1) if subject_lens else 0.0,
-        "avg_body_len": round(statistics.mean(body_lens), 1) if body_lens else 0.0,
     }
+    for pct in PERCENTILES:
+        low, high = percentile_ci(ordered, pct, confidence)
+        summary[f"p{pct}_latency_ms"] = round(percentile(ordered, pct), 1)
+        summary[f"p{pct}_ci_low_ms"] = _ms(low)
+        summary[f"p{pct}_ci_high_ms"] = _ms(high)
+    summary["avg_subject_len"] = round(statistics.mean(subject_lens), 1) if subject_lens else 0.0
+    summary["avg_body_len"] = round(statistics.mean(body_lens), 1) if body_lens else 0.0
     return rows, summary
 
 
@@ -186,21 +266,41 @@ def write_csv(path: Path, rows: list[dict[str, Any]]) -> None:
         writer.writerows(rows)
 
 
+def _with_ci(summary: dict[str, Any], pct: int) -> str:
+    low = summary[f"p{pct}_ci_low_ms"]
+    high = summary[f"p{pct}_ci_high_ms"]
+    return f"{summary[f'p{pct}_latency_ms']} [{'–' if low is None else low}, {'–' if high is None else high}]"
+
+
 def write_markdown(path: Path, summaries: list[dict[str, Any]], samples: list[dict[str, Any]], language: str) -> None:
     cn = language == "CN"
     lines = []
     lines.append("# 模型 A/B 测试报告" if cn else "# Model A/B Test Report")
     lines.append("")
     lines.append(f"- {'语言' if cn else 'Language'}: {language}")
+    if summaries:
+        first = summaries[0]
+        lines.append(f"- {'并发' if cn else 'Concurrency'}: {first['concurrency']}")
+        lines.append(f"- {'每条线索重复次数' if cn else 'Trials per lead'}: {first['trials']}")
+        lines.append(f"- {'预热请求（不计入统计）' if cn else 'Warmup requests (excluded)'}: {first['warmup']}")
     lines.append("")
     lines.append("## 概览" if cn else "## Summary")
     lines.append("")
-    lines.append("| Model | Requests | Success | Success Rate | Avg Latency (ms) | P95 Latency (ms) | Avg Subject Len | Avg Body Len |")
-    lines.append("|---|---:|---:|---:|---:|---:|---:|---:|")
+    lines.append(
+        "| Model | Concurrency | Requests | Success | Success Rate | Req/s | Avg (ms) | P50 (ms) | P90 (ms) | P95 (ms) | P99 (ms) | Avg Subject Len | Avg Body Len |"
+    )
+    lines.append("|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|")
     for s in summaries:
+        cells = " | ".join(_with_ci(s, pct) for pct in PERCENTILES)
         lines.append(
-            f"| {s['model']} | {s['requests']} | {s['success']} | {s['success_rate']}% | {s['avg_latency_ms']} | {s['p95_latency_ms']} | {s['avg_subject_len']} | {s['avg_body_len']} |"
+            f"| {s['model']} | {s['concurrency']} | {s['requests']} | {s['success']} | {s['success_rate']}% | {s['throughput_rps']} | {s['avg_latency_ms']} | {cells} | {s['avg_subject_len']} | {s['avg_body_len']} |"
         )
+    lines.append("")
+    lines.append(
+        "百分位括号内为置信区间（基于次序统计量），– 表示样本太少无法给出。"
+        if cn
+        else "Brackets show the confidence interval of each percentile (order statistics); – means too few requests for that bound."
+    )
 
     lines.append("")
     lines.append("## 示例输出" if cn else "## Sample Outputs")
@@ -221,6 +321,33 @@ def write_markdown(path: Path, summaries: list[dict[str, Any]], samples: list[di
     path.write_text("\n".join(lines), encoding="utf-8")
 
 
+async def run_all(key: str, models: list[str], leads: list[Lead], args: argparse.Namespace) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    # Models run one after another so they do not compete for the same connection and rate limits.
+    client = AsyncOpenAI(api_key=key, base_url=args.base_url or os.getenv("OPENAI_BASE_URL") or None)
+    all_rows: list[dict[str, Any]] = []
+    summaries: list[dict[str, Any]] = []
+    try:
+        for model in models:
+            rows, summary = await run_model_test(
+                client,
+                model,
+                leads,
+                language=args.language,
+                brand_name=args.brand_name,
+                positioning=args.positioning,
+                tone=args.tone,
+                concurrency=max(1, args.concurrency),
+                trials=max(1, args.trials),
+                warmup=max(0, args.warmup),
+                confidence=args.confidence,
+            )
+            all_rows.extend(rows)
+            summaries.append(summary)
+    finally:
+        await client.close()
+    return all_rows, summaries
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="A/B test OpenAI models for Sunny Demo outreach generation")
     parser.add_argument("--models", default="gpt-4o-mini,gpt-4.1-mini,gpt-4o", help="Comma-separated model list")
@@ -232,6 +359,14 @@ def main() -> None:
     parser.add_argument("--positioning", default="面向住宅、软装与精品酒店场景的中高端家具与灯具供应方案。")
     parser.add_argument("--tone", default="专业、务实、可信")
     parser.add_argument("--output-dir", default="abtest_output")
+    parser.add_argument("--concurrency", type=int, default=4, help="In-flight requests per model")
+    # Defaults send one request per lead per model; every extra trial or warmup request is a paid API call.
+    parser.add_argument("--trials", type=int, default=1, help="Requests per lead per model (each one is billed)")
+    parser.add_argument(
+        "--warmup", type=int, default=0, help="Requests per model sent first and left out of the stats (also billed)"
+    )
+    parser.add_argument("--base-url", default="", help="API base URL, e.g. the fake server's http://127.0.0.1:8787/v1")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level for percentile intervals")
     args = parser.parse_args()
 
     base_dir = Path(__file__).resolve().parents[1]
@@ -251,24 +386,8 @@ def main() -> None:
     if not leads:
         raise SystemExit("No leads loaded from input CSV")
 
-    client = OpenAI(api_key=key)
     models = [m.strip() for m in args.models.split(",") if m.strip()]
-
-    all_rows: list[dict[str, Any]] = []
-    summaries: list[dict[str, Any]] = []
-
-    for model in models:
-        rows, summary = run_model_test(
-            client,
-            model,
-            leads,
-            language=args.language,
-            brand_name=args.brand_name,
-            positioning=args.positioning,
-            tone=args.tone,
-        )
-        all_rows.extend(rows)
-        summaries.append(summary)
+    all_rows, summaries = asyncio.run(run_all(key, models, leads, args))
 
     summary_csv = output_dir / "model_ab_summary.csv"
     details_csv = output_dir / "model_ab_details.csv"
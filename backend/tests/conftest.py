@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+import sys
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND = Path(__file__).resolve().parent.parent
+for extra in (BACKEND / "scripts", BACKEND / "benchmarks"):
+    sys.path.insert(0, str(extra))
+
+# Read when app.settings is imported: the app's stores go to a scratch directory, and a
+# developer's .env cannot switch the AI path on for the endpoint tests.
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="lead-tests-")
+os.environ["OPENAI_API_KEY"] = ""
+
+from fake_openai_server import FakeConfig, running_server  # noqa: E402
+from synthetic_leads import generate_leads  # noqa: E402
+
+from app.ai_service import AIService  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+SAMPLE_CSV = BACKEND.parent / "sample-data" / "sample_leads.csv"
+
+# Rows the synthetic generator never produces: punctuation around keywords, casing,
+# partial words, missing and non-numeric fields.
+EDGE_ROWS = [
+    {"company_name": "Edge Hotel", "state": "ca", "description": "Hotel-lighting, FF&E; hospitality.", "services": "FF&E;Procurement"},
+    {"company_name": "Edge Staging", "state": "TX", "description": "MODEL HOME staging; décor", "services": "home staging"},
+    {"company_name": "Edge Partial", "state": "NY", "description": "interiors designer hotels", "services": "designs"},
+    {"company_name": "Edge Blank", "state": "", "description": "", "services": "", "employee_estimate": "n/a"},
+    {"company_name": "Edge Numbers", "website": "HTTP://upper.example", "employee_estimate": "80", "project_count": "60"},
+    {"company_name": "Edge Retail", "state": "FL", "description": "retail store, DIY and residential only", "services": ";;"},
+]
+
+
+def csv_bytes(rows: list[dict[str, str]]) -> bytes:
+    fields = list(dict.fromkeys(name for row in rows for name in row))
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+@pytest.fixture(scope="session")
+def lead_rows() -> list[dict[str, str]]:
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as handle:
+        sample = list(csv.DictReader(handle))
+    return [*sample, *EDGE_ROWS, *generate_leads(1500, seed=11)]
+
+
+@pytest.fixture
+def fake_openai() -> Iterator[Callable[..., str]]:
+    """Starts a fake Responses API per call, e.g. fake_openai(reject_temperature=True), and returns its base URL."""
+    with ExitStack() as stack:
+        yield lambda **config: stack.enter_context(running_server(FakeConfig(**{"latency_ms": 0, **config})))
+
+
+@pytest.fixture
+def ai_service(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Callable[..., AIService]:
+    """Builds an AIService against `base_url` with its cache under tmp_path; extra kwargs override settings."""
+
+    def build(base_url: str, **overrides: object) -> AIService:
+        for name, value in {"openai_api_key": "sk-test", "openai_base_url": base_url, "data_dir": str(tmp_path), **overrides}.items():
+            monkeypatch.setattr(settings, name, value)
+        return AIService()
+
+    return build
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def sample_csv() -> bytes:
+    return SAMPLE_CSV.read_bytes()
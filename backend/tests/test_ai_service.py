@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import csv
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from app.scoring import score_lead
+from app.settings import settings
+
+from .conftest import SAMPLE_CSV
+
+DRAFT_OPTIONS = {"brand_name": "Acme", "positioning": "Furniture for projects.", "tone": "practical", "language": "EN"}
+
+
+def fake_counts(base_url: str) -> dict[str, int]:
+    with urllib.request.urlopen(base_url.replace("/v1", "/stats")) as response:
+        return json.load(response)["counts"]
+
+
+@pytest.fixture(scope="module")
+def leads():
+    with SAMPLE_CSV.open(newline="", encoding="utf-8") as handle:
+        return [score_lead(row, {"CA"}, "EN", "Acme") for row in csv.DictReader(handle)]
+
+
+def test_malformed_drafts_are_not_cached(fake_openai, ai_service, leads):
+    base_url = fake_openai(output_modes=("malformed",))
+    ai = ai_service(base_url)
+    for run in (1, 2):
+        assert ai.generate_outreach_many(leads, **DRAFT_OPTIONS) == [None] * len(leads)
+        # Every lead goes back to the model; nothing malformed was kept.
+        assert fake_counts(base_url)["requests"] == run * len(leads)
+
+
+def test_parsed_drafts_are_cached(fake_openai, ai_service, leads):
+    base_url = fake_openai(output_modes=("json", "fenced", "malformed"))
+    ai = ai_service(base_url)
+    first = ai.generate_outreach_many(leads, **DRAFT_OPTIONS)
+    parsed = sum(draft is not None for draft in first)
+    assert 0 < parsed < len(leads)
+
+    second = ai.generate_outreach_many(leads, **DRAFT_OPTIONS)
+    assert second == first
+    assert fake_counts(base_url)["requests"] == 2 * len(leads) - parsed
+
+
+def test_refine_does_not_cache_malformed_output(fake_openai, ai_service):
+    base_url = fake_openai(output_modes=("malformed",))
+    ai = ai_service(base_url)
+    request = {
+        **DRAFT_OPTIONS,
+        "company_name": "Acme Interiors",
+        "city": "Austin",
+        "state": "TX",
+        "services": "interior design",
+        "description": "Boutique hospitality interiors.",
+        "current_subject": "Hello",
+        "current_message": "Hi there",
+        "feedback": "shorter",
+    }
+    assert ai.refine_outreach(**request) is None
+    events = list(ai.refine_outreach_stream(**request))
+    assert events[-1][1] is None
+    assert fake_counts(base_url)["requests"] == 2
+
+
+def test_rejected_temperature_is_probed_once(fake_openai, ai_service, leads):
+    base_url = fake_openai(latency_ms=50, latency_dist="fixed", reject_temperature=True)
+    ai = ai_service(base_url, ai_cache_enabled=False)
+    drafts = ai.generate_outreach_many(leads, **DRAFT_OPTIONS, max_concurrency=len(leads))
+    assert all(draft is not None for draft in drafts)
+    counts = fake_counts(base_url)
+    assert counts["temperature_rejected"] == 1
+    assert counts["requests"] == len(leads) + 1
+    assert ai.unsupported_params_snapshot() == {settings.openai_model: ["temperature"]}
+
+    ai.generate_outreach_many(leads[:3], **DRAFT_OPTIONS)
+    assert fake_counts(base_url)["temperature_rejected"] == 1
+
+
+def test_batched_drafts_share_the_single_lead_cache(fake_openai, ai_service, leads):
+    base_url = fake_openai()
+    ai = ai_service(base_url, ai_batch_max_leads=5)
+    drafts = ai.generate_outreach_many(leads, **DRAFT_OPTIONS, batch=True)
+    assert all(draft is not None for draft in drafts)
+    for lead, (subject, _) in zip(leads, drafts):
+        assert lead.company_name in subject
+    assert fake_counts(base_url)["requests"] == -(-len(leads) // 5)
+
+    # Each batched draft was cached under its lead's single-lead prompt.
+    assert ai.generate_outreach_many(leads, **DRAFT_OPTIONS) == drafts
+    assert fake_counts(base_url)["requests"] == -(-len(leads) // 5)
+
+
+def test_malformed_batches_are_retried_then_left_to_templates(fake_openai, ai_service, leads):
+    base_url = fake_openai(output_modes=("malformed",))
+    ai = ai_service(base_url, ai_batch_max_leads=5, ai_batch_retries=1)
+    assert ai.generate_outreach_many(leads, **DRAFT_OPTIONS, batch=True) == [None] * len(leads)
+    batches = -(-len(leads) // 5)
+    assert fake_counts(base_url)["requests"] == 2 * batches
+
+    assert ai.generate_outreach_many(leads, **DRAFT_OPTIONS, batch=True) == [None] * len(leads)
+    assert fake_counts(base_url)["requests"] == 4 * batches
+
+
+def test_health_reads_the_param_memo_while_probes_update_it(ai_service):
+    ai = ai_service("http://127.0.0.1:9/v1")
+    stop = threading.Event()
+
+    def probe() -> None:
+        index = 0
+        while not stop.is_set():
+            index += 1
+            event = threading.Event()
+            with ai._params_lock:
+                ai._param_probes[f"model-{index}"] = event
+            ai._finish_probe(f"model-{index}", event, {"temperature"}, checked=True)
+
+    writer = threading.Thread(target=probe)
+    writer.start()
+    try:
+        for _ in range(2000):
+            snapshot = ai.unsupported_params_snapshot()
+            assert all(params == ["temperature"] for params in snapshot.values())
+    finally:
+        stop.set()
+        writer.join()
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+
+import pytest
+from synthetic_leads import generate_leads
+
+from app.lead_store import MAX_RUN_LEADS, RANK_BITS, SCORE_SHIFT, LeadStore, lead_id
+from app.main import lead_store
+from app.scoring import score_lead
+
+from .conftest import csv_bytes
+
+
+def process(client, payload: bytes, **form: str) -> dict:
+    response = client.post("/api/process", files={"file": ("leads.csv", payload, "text/csv")}, data={"ai_cache": "false", **form})
+    assert response.status_code == 200, response.text
+    lead_store.flush()
+    return response.json()
+
+
+def search_all(client, **params: str) -> list[dict]:
+    leads, cursor = [], ""
+    while True:
+        response = client.get("/api/leads/search", params={**params, "cursor": cursor, "limit": "7"})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        leads.extend(page["leads"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return leads
+
+
+def test_process_runs_are_searchable_with_filters_and_cursor(client):
+    result = process(client, csv_bytes(list(generate_leads(60, seed=101))))
+    run_id = result["result_id"]
+
+    leads = search_all(client, run_id=run_id)
+    assert len(leads) == 60
+    assert [lead["rank"] for lead in leads] == list(range(1, 61))
+    assert [lead["score"] for lead in leads] == sorted((lead["score"] for lead in leads), reverse=True)
+
+    in_ca = search_all(client, run_id=run_id, state="CA,tx")
+    assert {lead["state"] for lead in in_ca} <= {"CA", "TX"}
+    assert len(in_ca) == sum(lead["state"] in ("CA", "TX") for lead in leads)
+
+    tier_a = search_all(client, run_id=run_id, tier="a", min_score="70")
+    assert all(lead["tier"] == "A" and lead["score"] >= 70 for lead in tier_a)
+    assert len(tier_a) == sum(lead["tier"] == "A" and lead["score"] >= 70 for lead in leads)
+
+    hotel = search_all(client, run_id=run_id, q="hospital*")
+    assert hotel and all("hospital" in (lead["description"] + lead["services"]).lower() for lead in hotel)
+
+    assert search_all(client, run_id=run_id, since="2999-01-01") == []
+
+
+def test_search_rejects_bad_cursor_and_since(client):
+    assert client.get("/api/leads/search", params={"cursor": "-1"}).status_code == 400
+    assert client.get("/api/leads/search", params={"cursor": "abc"}).status_code == 400
+    assert client.get("/api/leads/search", params={"since": "last week"}).status_code == 400
+
+
+def test_rescore_and_export_are_not_archived(client):
+    payload = csv_bytes(list(generate_leads(40, seed=102)))
+    dataset = client.post("/api/datasets", files={"file": ("leads.csv", payload, "text/csv")}).json()
+    lead_store.flush()
+    runs = lead_store.snapshot()["runs"]
+
+    for states in ("CA", "TX", "NY,FL"):
+        response = client.post(f"/api/datasets/{dataset['dataset_id']}/rescore", data={"target_states": states})
+        assert response.status_code == 200
+    assert client.post("/api/export", files={"file": ("leads.csv", payload, "text/csv")}).status_code == 200
+    lead_store.flush()
+    assert lead_store.snapshot()["runs"] == runs
+
+
+def test_since_window_has_no_bound_variable_limit(tmp_path):
+    # More recent runs than SQLite allows bound variables in one statement (the limit is
+    # build-dependent, so it is lowered here).
+    store = LeadStore(str(tmp_path / "leads.sqlite3"), retention_days=0)
+    store._read_db.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    leads = [score_lead(row, {"CA"}, "EN", "Acme") for row in generate_leads(5, seed=103)]
+    store.save("kept", [leads], brand_name="Acme", language="EN", scoring_plan_version="1").result()
+    now = time.time()
+    with store._write_db as db:
+        db.executemany(
+            "INSERT INTO runs (run_id, created_at, brand_name, language, scoring_plan_version, seq) VALUES (?, ?, 'Acme', 'EN', '1', ?)",
+            ((f"empty-{index}", now, index + 2) for index in range(2000)),
+        )
+    found, _ = store.search(since=now - 60, limit=10)
+    assert len(found) == 5
+    assert store.search(since=now + 60) == ([], None)
+
+
+def test_lead_id_rejects_ranks_past_its_bits():
+    assert lead_id(50, 2, MAX_RUN_LEADS) == 50 << SCORE_SHIFT | 2 << RANK_BITS
+    assert lead_id(50, 2, 1) > lead_id(50, 2, 2) > lead_id(50, 1, 1)
+    with pytest.raises(ValueError):
+        lead_id(50, 2, MAX_RUN_LEADS + 1)
+
+
+def test_oversized_runs_are_rejected_whole(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.sqlite3"), retention_days=0)
+    leads = [score_lead(row, {"CA"}, "EN", "Acme") for row in generate_leads(12, seed=104)]
+    store.save("small", [leads[:4]], brand_name="Acme", language="EN", scoring_plan_version="1").result()
+    store.max_run_leads = 5
+    store.save("large", [leads[:4], leads[4:]], brand_name="Acme", language="EN", scoring_plan_version="1").result()
+
+    snapshot = store.snapshot()
+    assert (snapshot["runs"], snapshot["leads"], snapshot["runs_rejected"]) == (1, 4, 1)
+    assert store.search(run_id="large") == ([], None)
+    assert len(store.search(run_id="small")[0]) == 4
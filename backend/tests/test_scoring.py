@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import csv
+import io
+from collections import Counter
+from statistics import mean
+
+import numpy as np
+import pytest
+
+from app.aggregates import LeadAggregate
+from app.datasets import DatasetStore
+from app.scoring import (
+    DEFAULT_PLAN,
+    ScoreBreakdown,
+    choose_tier,
+    keyword_points,
+    normalize_text,
+    parse_services,
+    pick_offer_angle,
+    score_batch,
+    score_lead,
+    score_row,
+    summarize_state_tiers,
+    to_int,
+)
+
+STATE_SETS = [set(), {"CA", "TX", "NY"}, {"FL"}]
+
+
+def reference_score_row(row: dict[str, str], target_states: set[str]) -> ScoreBreakdown:
+    # The original per-row scorer: one regex or substring check per keyword.
+    plan = DEFAULT_PLAN
+    caps = plan.caps
+    text = normalize_text(row.get("description", ""), row.get("services", ""))
+    service_list = parse_services(row.get("services", ""))
+
+    industry_fit = keyword_points(text, plan.fit_keywords, caps["industry_fit"])
+    product_match = min(caps["product_match"], sum(points for term, points in plan.product_terms.items() if term in text))
+
+    has_website = 1 if row.get("website", "").startswith("http") else 0
+    has_trade = 1 if row.get("has_trade_program", "").strip().lower() == "yes" else 0
+    has_procurement = 1 if row.get("has_procurement_page", "").strip().lower() == "yes" else 0
+    digital_signal = min(caps["digital_signal"], (has_website + has_trade + has_procurement) * 5)
+
+    employees = to_int(row.get("employee_estimate", "0"))
+    projects = to_int(row.get("project_count", "0"))
+    scale_signal = 8 if 10 <= employees <= 80 else 5 if employees > 80 else 0
+    scale_signal += 7 if projects >= 100 else 4 if projects >= 60 else 0
+    scale_signal = min(caps["scale_signal"], scale_signal)
+    if target_states and row.get("state", "").upper() in target_states:
+        scale_signal = min(caps["scale_signal"], scale_signal + 2)
+
+    intent_signal = keyword_points(text, plan.intent_keywords, caps["intent_signal"])
+    penalties = keyword_points(text, plan.negative_keywords, caps["penalties"])
+    for service, bonus in plan.service_bonus.items():
+        if service in service_list:
+            industry_fit = min(caps["industry_fit"], industry_fit + bonus)
+
+    return ScoreBreakdown(
+        industry_fit=industry_fit,
+        product_match=product_match,
+        digital_signal=digital_signal,
+        scale_signal=scale_signal,
+        intent_signal=intent_signal,
+        penalties=penalties,
+    )
+
+
+def reference_angle(text: str) -> str:
+    if "hospitality" in text or "hotel" in text:
+        return "a hospitality FF&E package with repeat property rollout"
+    if "staging" in text or "model home" in text:
+        return "fast-turn staging bundles with predictable replenishment"
+    if "lighting" in text:
+        return "lighting-plus-furniture bundles for cohesive project design"
+    return "trade pricing and curated furniture/lighting bundles"
+
+
+def reference_summary(rows: list[dict[str, str]], target_states: set[str]) -> dict:
+    scored = []
+    for row in rows:
+        total = reference_score_row(row, target_states).total
+        scored.append({"score": total, "tier": choose_tier(total), "state": row.get("state", "")})
+    scored.sort(key=lambda item: item["score"], reverse=True)
+    tiers = Counter(item["tier"] for item in scored)
+    return {
+        "total_leads": len(scored),
+        "average_score": round(mean(item["score"] for item in scored), 1),
+        "tier_a": tiers["A"],
+        "tier_b": tiers["B"],
+        "tier_c": tiers["C"],
+        "top_states": summarize_state_tiers([item["state"] for item in scored if item["state"]]),
+    }
+
+
+def to_csv(rows: list[dict[str, str]]) -> bytes:
+    fields = list(dict.fromkeys(name for row in rows for name in row))
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode("utf-8")
+
+
+@pytest.mark.parametrize("target_states", STATE_SETS)
+def test_matcher_scores_match_reference(lead_rows, target_states):
+    for row in lead_rows:
+        breakdown, _, text = score_row(row, target_states)
+        assert breakdown == reference_score_row(row, target_states), row
+        assert pick_offer_angle(text) == reference_angle(text), row
+
+
+@pytest.mark.parametrize("target_states", STATE_SETS)
+def test_score_batch_matches_score_row(lead_rows, target_states):
+    columns = {name: [row.get(name, "") for row in lead_rows] for name in dict.fromkeys(k for row in lead_rows for k in row)}
+    batch = score_batch(columns, target_states)
+    assert len(batch) == len(lead_rows)
+    for index, row in enumerate(lead_rows):
+        breakdown, reasons, _ = score_row(row, target_states)
+        assert batch.breakdown(index) == breakdown, row
+        assert batch.tier[index] == choose_tier(breakdown.total)
+        assert batch.reasons(index) == reasons
+
+
+@pytest.mark.parametrize("target_states", STATE_SETS)
+@pytest.mark.parametrize("language", ["EN", "CN"])
+def test_dataset_rescore_matches_score_lead(lead_rows, tmp_path, target_states, language):
+    # Rows are read back from CSV, so missing columns come back as "" rather than absent.
+    payload = to_csv(lead_rows)
+    parsed = list(csv.DictReader(io.StringIO(payload.decode("utf-8"))))
+    store = DatasetStore(str(tmp_path), memory_entries=2, disk_entries=4)
+    dataset, created = store.ingest(io.BytesIO(payload), 4096, DEFAULT_PLAN)
+    assert created and dataset is not None
+
+    ranked = dataset.rescore(DEFAULT_PLAN, target_states, language, "Acme")
+    expected = [score_lead(row, target_states, language, "Acme") for row in parsed]
+    assert [ranked.record(index) for index in range(len(parsed))] == expected
+    order = sorted(range(len(expected)), key=lambda index: -expected[index].score)
+    assert ranked.ranked() == [expected[index] for index in order]
+    assert ranked.aggregate().summary() == LeadAggregate().add(expected).summary()
+
+
+@pytest.mark.parametrize("target_states", STATE_SETS)
+def test_aggregate_matches_reference_summary(lead_rows, target_states):
+    leads = [score_lead(row, target_states, "EN", "Acme") for row in lead_rows]
+    summary = LeadAggregate().add(leads).summary()
+    expected = reference_summary(lead_rows, target_states)
+    assert summary.model_dump(include=set(expected)) == expected
+
+    scores = np.array([lead.score for lead in leads])
+    assert summary.score_quantiles == {
+        f"p{round(q * 100)}": round(float(np.quantile(scores, q)), 1) for q in (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+    }
+    assert sum(item.total for item in summary.state_tiers) == sum(1 for lead in leads if lead.state)
+    assert summary.component_averages["industry_fit"] == round(mean(lead.industry_fit for lead in leads), 2)
+
+
+def test_aggregate_chunks_merge_to_whole(lead_rows):
+    leads = [score_lead(row, {"CA"}, "EN", "Acme") for row in lead_rows]
+    whole = LeadAggregate().add(leads)
+    merged = LeadAggregate()
+    # Merge out of order: offsets keep each state's first ranked row.
+    for start in sorted(range(0, len(leads), 97), reverse=True):
+        merged.merge(LeadAggregate().add(leads[start : start + 97], start))
+    assert merged == whole
+    assert merged.summary() == whole.summary()
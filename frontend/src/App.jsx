@@ -251,6 +251,7 @@ function App() {
   const [health, setHealth] = useState(null);
   const [refineFeedback, setRefineFeedback] = useState("");
   const [refining, setRefining] = useState(false);
+  const [refinePreview, setRefinePreview] = useState("");
   const [copiedField, setCopiedField] = useState("");
 
   const t = I18N[language];
@@ -389,9 +390,10 @@ function App() {
     }
 
     setRefining(true);
+    setRefinePreview("");
     setError("");
     try {
-      const response = await fetch(`${API_BASE}/api/refine-outreach`, {
+      const response = await fetch(`${API_BASE}/api/refine-outreach/stream?format=ndjson`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
@@ -415,7 +417,35 @@ function App() {
         throw new Error(body.detail || t.refineFailed);
       }
 
-      const data = await response.json();
+      // NDJSON events: "delta" chunks of model output, then "done" (or "error").
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let preview = "";
+      let data = null;
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.event === "delta") {
+            preview += event.text;
+            setRefinePreview(preview);
+          } else if (event.event === "done") {
+            data = event;
+          } else if (event.event === "error") {
+            throw new Error(event.detail || t.refineFailed);
+          }
+        }
+      }
+      if (!data) {
+        throw new Error(t.refineFailed);
+      }
+
       setResult((prev) => {
         if (!prev) return prev;
         const nextLeads = [...prev.leads];
@@ -431,6 +461,7 @@ function App() {
       setError(err.message || t.refineFailed);
     } finally {
       setRefining(false);
+      setRefinePreview("");
     }
   };
 
@@ -688,6 +719,7 @@ function App() {
                       {refining ? t.refining : t.refineButton}
                     </button>
                   </div>
+                  {refining && refinePreview && <pre className="refine-preview">{refinePreview}</pre>}
                 </>
               ) : (
                 <p className="small-muted">{t.runToInspect}</p>